@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -48,11 +49,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store.instrumentation.QueryInstrumentationMiddleware',
+    'store.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'store.auth.CachedAuthenticationMiddleware',
+    'store.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -82,17 +86,113 @@ WSGI_APPLICATION = 'books.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_POOL=1 draws connections from an in-process pool (store.backends.postgresql),
+# DB_CONN_MAX_AGE keeps a connection per thread open across requests instead.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': (
+            'store.backends.postgresql' if os.getenv('DB_POOL', '0') == '1'
+            else 'django.db.backends.postgresql_psycopg2'
+        ),
         'NAME': os.getenv('NAME_DB'),
         'USER': os.getenv('USER_DB'),
         'PASSWORD': os.getenv('PASSWORD_DB'),
-        'HOST': 'localhost',
-        'PORT': '5432'
+        'HOST': os.getenv('HOST_DB', 'localhost'),
+        'PORT': os.getenv('PORT_DB', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+            'CHECK_INTERVAL': float(os.getenv('DB_POOL_CHECK_INTERVAL', 30)),
+        },
     }
 }
 
+# Read replicas of the default database, DB_REPLICA_HOSTS=host[:port],... (see store.routers).
+STORE_READ_REPLICAS = []
+for number, address in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    STORE_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['store.routers.ReplicaRouter']
+
+# How long a user who wrote reads from the primary, to cover the replication lag.
+STORE_REPLICA_STICKY_SECONDS = float(os.getenv('STORE_REPLICA_STICKY_SECONDS', 5))
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+STORE_RESPONSE_CACHE_TIMEOUT = int(os.getenv('STORE_RESPONSE_CACHE_TIMEOUT', 300))
+
+STORE_SERVER_TIMING = os.getenv('STORE_SERVER_TIMING', '1') == '1'
+STORE_N_PLUS_ONE_THRESHOLD = int(os.getenv('STORE_N_PLUS_ONE_THRESHOLD', 5))
+
+# Threads running the async views, asgiref's default pool when unset.
+STORE_ASYNC_THREADS = int(os.getenv('STORE_ASYNC_THREADS', 0)) or None
+
+# Bayesian rating score prior, run rebuild_book_counters after changing it.
+STORE_RATING_PRIOR_MEAN = float(os.getenv('STORE_RATING_PRIOR_MEAN', 3.0))
+STORE_RATING_PRIOR_WEIGHT = int(os.getenv('STORE_RATING_PRIOR_WEIGHT', 10))
+
+STORE_IMPORT_BATCH_SIZE = int(os.getenv('STORE_IMPORT_BATCH_SIZE', 1000))
+
+# Best matches kept by the search without PostgreSQL, see store.search.search_books.
+STORE_SEARCH_MAX_MATCHES = int(os.getenv('STORE_SEARCH_MAX_MATCHES', 300))
+
+# In-process top books per counter, see store.leaderboards.
+STORE_LEADERBOARD_SIZE = int(os.getenv('STORE_LEADERBOARD_SIZE', 50))
+STORE_LEADERBOARD_TTL = float(os.getenv('STORE_LEADERBOARD_TTL', 60))
+
+# Like/bookmark toggle buffering, '' (off), 'memory' or 'database', see store.writebehind.
+STORE_WRITE_BEHIND = os.getenv('STORE_WRITE_BEHIND', '')
+STORE_WRITE_BEHIND_INTERVAL = float(os.getenv('STORE_WRITE_BEHIND_INTERVAL', 1.0))
+STORE_WRITE_BEHIND_BATCH = int(os.getenv('STORE_WRITE_BEHIND_BATCH', 500))
+STORE_WRITE_BEHIND_MAX_PENDING = int(os.getenv('STORE_WRITE_BEHIND_MAX_PENDING', 10000))
+
+# Response compression, see store.compression; brotli and zstandard are used when installed.
+STORE_COMPRESSION_MIN_SIZE = int(os.getenv('STORE_COMPRESSION_MIN_SIZE', 1024))
+STORE_COMPRESSION_ENCODINGS = os.getenv('STORE_COMPRESSION_ENCODINGS', 'br,zstd,gzip').split(',')
+
+# Sliding window limits per client, see store.throttling; an empty rate disables a limit.
+STORE_THROTTLE_RATES = {
+    'book_list': {
+        'burst': os.getenv('STORE_THROTTLE_BOOK_LIST_BURST', '50/s'),
+        'sustained': os.getenv('STORE_THROTTLE_BOOK_LIST_SUSTAINED', '1000/min'),
+    },
+    'relation_update': {
+        'burst': os.getenv('STORE_THROTTLE_RELATION_UPDATE_BURST', '20/s'),
+        'sustained': os.getenv('STORE_THROTTLE_RELATION_UPDATE_SUSTAINED', '300/min'),
+    },
+}
+if sys.argv[1:2] == ['test']:
+    # Every test client shares one address and the counters outlive a test,
+    # store.tests.test_throttling sets its own rates.
+    STORE_THROTTLE_RATES = {}
+
+# Seconds a User row is cached by store.auth.CachedAuthenticationMiddleware, 0 disables it.
+STORE_USER_CACHE_TIMEOUT = int(os.getenv('STORE_USER_CACHE_TIMEOUT', 30))
+# Lifetime of the signed API tokens of POST /store/token/.
+STORE_AUTH_TOKEN_MAX_AGE = int(os.getenv('STORE_AUTH_TOKEN_MAX_AGE', 24 * 60 * 60))
+
+# 'django.contrib.sessions.backends.cached_db' skips the session table on
+# reads, only safe with a cache shared by every process (not locmem).
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+
 AUTHENTICATION_BACKENDS = (
     'social_core.backends.github.GithubOAuth2',
     'django.contrib.auth.backends.ModelBackend',
@@ -140,10 +240,19 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'store.auth.SignedTokenAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
     'DEFAULT_RENDERER_CLASSES': [
-        # 'rest_framework.renderers.JSONRenderer',
+        'store.renderers.FastJSONRenderer',
+        'store.renderers.ColumnarJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
-    ]
+    ],
+    # Proxies in front of the server appending to X-Forwarded-For, which
+    # store.throttling ignores unless this is set.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES')) if os.getenv('NUM_PROXIES') else None,
 }
 
 # SOCIAL_AUTH_POSTGRES_JSONFIELD = True
@@ -1,13 +1,66 @@
 from django.contrib import admin
+from django.db.models import FloatField
+from django.db.models.expressions import ExpressionWrapper
+from django.db.models.functions import Cast, NullIf
 
 from store.models import Book, UserBookRelation
+from store.pagination import EstimatedCountPaginator
+from store.search import search_books, tokenize
 
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    pass
+    list_display = (
+        "id",
+        "name",
+        "author",
+        "price",
+        "discount",
+        "owner",
+        "likes_count",
+        "bookmarks_count",
+        "rating",
+        "rating_score",
+    )
+    list_select_related = ("owner",)
+    raw_id_fields = ("owner",)
+    readonly_fields = Book.COUNTER_FIELDS + ("rating_score",)
+    search_fields = ("name", "author")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # The counters are materialized on the book, the average rating is
+        # computed in the same row query as every other column.
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                rating=ExpressionWrapper(
+                    Cast("rating_sum", FloatField()) / NullIf("rating_count", 0),
+                    output_field=FloatField(),
+                )
+            )
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        # The API search (search vector on PostgreSQL) instead of LIKE '%term%'.
+        words = tokenize(search_term)
+        if not words:
+            return queryset, False
+        return search_books(queryset, words), False
+
+    @admin.display(ordering="rating")
+    def rating(self, obj):
+        return obj.rating
 
 
 @admin.register(UserBookRelation)
 class UserBookRelationAdmin(admin.ModelAdmin):
-    pass
+    list_display = ("id", "user", "book", "like", "in_bookmarks", "rate")
+    list_filter = ("like", "in_bookmarks", "rate")
+    # UserBookRelation.__str__ and the user/book columns read both relations.
+    list_select_related = ("user", "book")
+    raw_id_fields = ("user", "book")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class StoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'store'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from store import signals  # noqa: F401
+        from store.instrumentation import install
+        from store.routers import check_shared_cache
+
+        connection_created.connect(install, dispatch_uid="store.instrumentation.install")
+        checks.register(check_shared_cache, checks.Tags.caches)
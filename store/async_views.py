@@ -0,0 +1,64 @@
+"""
+Async variants of the book read path and of the relation update, for ASGI.
+
+Django 3.2 has no async ORM, so every view runs its synchronous DRF
+counterpart in a thread pool (``sync_to_async(thread_sensitive=False)``) and
+renders the response there as well. While a request waits on a slow client
+the event loop serves others, only the database work holds a thread. The
+pool is asgiref's default one unless ``STORE_ASYNC_THREADS`` sizes a
+dedicated pool. Connections opened by the pool threads are closed with
+``close_old_connections`` as after a WSGI request, following
+``CONN_MAX_AGE``.
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from store.instrumentation import span
+from store.views import BookViewSet, UserBookRelationView
+
+_executors = {}
+
+
+def get_executor():
+    threads = getattr(settings, "STORE_ASYNC_THREADS", None)
+    if not threads:
+        return None
+    if threads not in _executors:
+        _executors[threads] = ThreadPoolExecutor(threads, thread_name_prefix="store-async")
+    return _executors[threads]
+
+
+def offload(view):
+    """Async view running the sync ``view`` and its rendering in the thread pool."""
+
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, "render", None)):
+                with span("render"):
+                    response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        executor = get_executor()
+        run_in_thread = sync_to_async(run, thread_sensitive=False, executor=executor)
+        return await run_in_thread(request, *args, **kwargs)
+
+    return async_view
+
+
+book_list = offload(BookViewSet.as_view({"get": "list"}, basename="book", detail=False))
+book_detail = offload(BookViewSet.as_view({"get": "retrieve"}, basename="book", detail=True))
+book_relation = offload(
+    UserBookRelationView.as_view(
+        {"put": "update", "patch": "partial_update"}, basename="userbookrelation", detail=True
+    )
+)
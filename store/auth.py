@@ -0,0 +1,145 @@
+"""
+Cached user lookups and stateless signed tokens.
+
+``CachedAuthenticationMiddleware`` replaces Django's
+``AuthenticationMiddleware``: the session still names the user, but the
+``User`` row comes from the cache for ``STORE_USER_CACHE_TIMEOUT`` seconds
+(0 disables it). A cached user is only used while the session hash matches,
+so a password change logs the other sessions out as before, and saving or
+deleting a user, or changing its groups and permissions, drops the cached
+copy (see ``store.signals``). Changes made with ``QuerySet.update()``, and
+changes made in processes that do not share the cache, are seen once the
+entry expires.
+
+``SignedTokenAuthentication`` reads ``Authorization: Bearer <token>`` with a
+token from ``POST /store/token/``. The token is signed with ``SECRET_KEY``
+and carries the user id, so authenticating it needs neither a session nor a
+token table; it expires after ``STORE_AUTH_TOKEN_MAX_AGE`` seconds and when
+the password changes.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from store.cache import get_cache
+
+TOKEN_SALT = "store.auth.token"
+# Enough of the session hash to revoke the tokens on a password change.
+TOKEN_HASH_LENGTH = 16
+
+
+def get_timeout():
+    return getattr(settings, "STORE_USER_CACHE_TIMEOUT", 30)
+
+
+def user_key(user_id):
+    return f"store:user:{user_id}"
+
+
+def cache_user(user):
+    if get_timeout():
+        get_cache().set(user_key(user.pk), user, get_timeout())
+
+
+def get_cached_user(user_id):
+    if not get_timeout():
+        return None
+    return get_cache().get(user_key(user_id))
+
+
+def invalidate_user(user_id):
+    get_cache().delete(user_key(user_id))
+
+
+def get_active_user(user_id):
+    """The active user ``user_id``, from the cache when possible, None otherwise."""
+    user = get_cached_user(user_id)
+    if user is None:
+        User = get_user_model()
+        try:
+            user = User._default_manager.get(pk=user_id)
+        except (User.DoesNotExist, ValueError, TypeError):
+            return None
+        cache_user(user)
+    return user if user.is_active else None
+
+
+def get_session_user(request):
+    """``django.contrib.auth.get_user`` served from the user cache when possible."""
+    try:
+        user_id = get_user_model()._meta.pk.to_python(request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    user = get_cached_user(user_id)
+    if (
+        user is not None
+        and backend_path in settings.AUTHENTICATION_BACKENDS
+        and constant_time_compare(request.session.get(HASH_SESSION_KEY) or "", user.get_session_auth_hash())
+    ):
+        return user
+    # Django's own checks decide, flushing a session that no longer verifies.
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache_user(user)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_session_user(request))
+
+
+def get_token_max_age():
+    return getattr(settings, "STORE_AUTH_TOKEN_MAX_AGE", 24 * 60 * 60)
+
+
+def make_token(user):
+    return signing.dumps(
+        {"u": user.pk, "h": user.get_session_auth_hash()[:TOKEN_HASH_LENGTH]},
+        salt=TOKEN_SALT,
+    )
+
+
+def check_token(token):
+    """The user of ``token``, None when it is invalid, expired or revoked."""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=get_token_max_age())
+        user = get_active_user(payload["u"])
+        token_hash = str(payload["h"])
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    if user is None:
+        return None
+    if not constant_time_compare(token_hash, user.get_session_auth_hash()[:TOKEN_HASH_LENGTH]):
+        return None
+    return user
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth_header = get_authorization_header(request).split()
+        if not auth_header or auth_header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth_header) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            token = auth_header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        user = check_token(token)
+        if user is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        return user, token
+
+    def authenticate_header(self, request):
+        return self.keyword
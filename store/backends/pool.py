@@ -0,0 +1,214 @@
+"""
+A bounded, thread-safe pool of DB-API connections.
+
+The pool opens at most ``max_size`` connections. ``acquire()`` hands out the
+most recently released idle connection, opens a new one while the pool is
+below its size, and otherwise waits up to ``timeout`` seconds for one to be
+released before raising ``PoolTimeout``. A connection idle for more than
+``check_interval`` seconds is checked with ``check`` before it is handed out,
+and a connection older than ``max_lifetime`` seconds is closed instead of
+being reused, so the server side and the network in between can drop
+connections without requests seeing it.
+"""
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        connect,
+        max_size=10,
+        timeout=5.0,
+        max_lifetime=None,
+        check_interval=30.0,
+        check=None,
+        close=None,
+    ):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.check = check
+        self.close_connection = close or (lambda connection: connection.close())
+        self.condition = threading.Condition()
+        # (connection, created at, released at), the last released on top.
+        self.idle = []
+        # id(connection) -> created at, of the checked out connections.
+        self.in_use = {}
+        self.size = 0
+        self.created = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def acquire(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No connection available within {self.timeout}s "
+                            f"({self.max_size} in use)."
+                        )
+                    if not waited:
+                        waited = True
+                        self.waits += 1
+                    self.condition.wait(remaining)
+                entry = self.idle.pop() if self.idle else None
+                if entry is None:
+                    self.size += 1
+
+            if entry is None:
+                try:
+                    connection = self.connect()
+                except BaseException:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+                created_at = time.monotonic()
+                with self.condition:
+                    self.created += 1
+            else:
+                connection, created_at, released_at = entry
+                if not self.is_healthy(connection, created_at, released_at):
+                    self.discard(connection)
+                    continue
+
+            with self.condition:
+                self.in_use[id(connection)] = created_at
+                self.checkouts += 1
+                if waited:
+                    self.wait_seconds += time.monotonic() - start
+            return connection
+
+    def release(self, connection, discard=False):
+        """Give ``connection`` back, closing it when ``discard`` or past its lifetime."""
+        with self.condition:
+            created_at = self.in_use.pop(id(connection), None)
+            if created_at is None:
+                # Not (or no longer) ours, e.g. checked out before clear().
+                self.close_quietly(connection)
+                return
+            if not discard and not self.is_expired(created_at):
+                self.idle.append((connection, created_at, time.monotonic()))
+                self.condition.notify()
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        self.close_quietly(connection)
+        with self.condition:
+            self.size -= 1
+            self.discarded += 1
+            self.condition.notify()
+
+    def close_quietly(self, connection):
+        try:
+            self.close_connection(connection)
+        except Exception:
+            pass
+
+    def is_expired(self, created_at):
+        return self.max_lifetime is not None and time.monotonic() - created_at >= self.max_lifetime
+
+    def is_healthy(self, connection, created_at, released_at):
+        if self.is_expired(created_at):
+            return False
+        if self.check is None or self.check_interval is None:
+            return True
+        if time.monotonic() - released_at < self.check_interval:
+            return True
+        try:
+            return bool(self.check(connection))
+        except Exception:
+            return False
+
+    def clear(self):
+        """Close the idle connections and forget the checked out ones."""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.in_use.clear()
+            self.size = 0
+            self.condition.notify_all()
+        for connection, _, _ in idle:
+            self.close_quietly(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "max_size": self.max_size,
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": len(self.in_use),
+                "created": self.created,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pid = None
+
+
+def get_pool(alias, key, connect, **options):
+    """
+    The pool of ``alias`` for connection parameters ``key``, created with
+    ``connect`` and ``options`` on first use. Pools are per process, those
+    inherited from a parent process are dropped without closing the parent's
+    connections.
+    """
+    global _pid
+    with _pools_lock:
+        if _pid != os.getpid():
+            _pools.clear()
+            _pid = os.getpid()
+        pool = _pools.get((alias, key))
+        if pool is None:
+            pool = _pools[(alias, key)] = ConnectionPool(connect, **options)
+        return pool
+
+
+def clear(alias=None):
+    """Close the idle connections of every pool, or of the pools of ``alias``."""
+    with _pools_lock:
+        pools = [pool for (name, _), pool in _pools.items() if alias in (None, name)]
+    for pool in pools:
+        pool.clear()
+
+
+def stats():
+    """Counters of every pool, by alias; the pools of an alias are summed up."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    totals = {}
+    for (alias, _), pool in pools:
+        current = pool.stats()
+        if alias in totals:
+            current = {name: totals[alias][name] + value for name, value in current.items()}
+        totals[alias] = current
+    return totals
+
+
+def reset():
+    """Drop every pool, for tests."""
+    clear()
+    with _pools_lock:
+        _pools.clear()
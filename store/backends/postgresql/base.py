@@ -0,0 +1,87 @@
+"""
+PostgreSQL backend drawing its connections from a ``store.backends.pool``.
+
+Select it with ``'ENGINE': 'store.backends.postgresql'`` and configure the
+pool with a ``POOL`` dict next to the other connection settings::
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 5, 'MAX_LIFETIME': 1800, 'CHECK_INTERVAL': 30}
+
+Closing a Django connection (at the end of every request with the default
+``CONN_MAX_AGE`` of 0) rolls back whatever is still open and returns the
+psycopg2 connection to the pool instead of closing it, so the next request
+skips the TCP, TLS and authentication handshakes. ``MAX_SIZE`` bounds the
+connections of the process across all threads, a thread waits up to
+``TIMEOUT`` seconds for one before ``OperationalError`` is raised. Session
+state changed with ``SET`` outlives the request, like with ``CONN_MAX_AGE``.
+"""
+from django.db.backends.postgresql.base import Database
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.utils.asyncio import async_unsafe
+from psycopg2 import extensions
+
+from store.backends import pool
+from store.backends.postgresql.creation import DatabaseCreation
+
+POOL_DEFAULTS = {"MAX_SIZE": 10, "TIMEOUT": 5.0, "MAX_LIFETIME": 1800.0, "CHECK_INTERVAL": 30.0}
+
+
+def check_connection(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    # The check leaves a transaction open outside autocommit mode.
+    connection.rollback()
+    return True
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get("POOL", {})}
+        key = tuple(sorted((name, repr(value)) for name, value in conn_params.items()))
+        return pool.get_pool(
+            self.alias,
+            key,
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            max_size=options["MAX_SIZE"],
+            timeout=options["TIMEOUT"],
+            max_lifetime=options["MAX_LIFETIME"],
+            check_interval=options["CHECK_INTERVAL"],
+            check=check_connection,
+        )
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self._pool = self.get_pool(conn_params)
+        try:
+            connection = self._pool.acquire()
+        except pool.PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        # Set by the parent on the connections it opens, see there.
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self._pool.release(self.connection, discard=not self.reset_connection())
+
+    def reset_connection(self):
+        """Roll back what the request left open, False when the connection is unusable."""
+        connection = self.connection
+        if connection.closed:
+            return False
+        if self.errors_occurred and not self.is_usable():
+            return False
+        try:
+            status = connection.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Database.Error:
+            return False
+        return True
@@ -0,0 +1,17 @@
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgreSQLDatabaseCreation
+
+from store.backends import pool
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    # Pooled connections to the test database would block using it as a
+    # template or dropping it.
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        self.connection.close()
+        pool.clear(self.connection.alias)
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        pool.clear(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,79 @@
+import json
+import statistics
+import time
+
+from django.db import connections
+
+
+def measure(func, repeat=20, setup=None):
+    """
+    Run ``func`` ``repeat`` times after a warm up call, return latencies in ms.
+
+    ``setup`` runs untimed before every call.
+    """
+    func()
+    latencies = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` counting and timing the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def summarize(latencies):
+    return {
+        "runs": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def explain(queryset, label=""):
+    """
+    The query plan of ``queryset``, with actual timings on PostgreSQL.
+
+    On SQLite the ``label`` comment keeps the driver's statement cache from
+    returning a plan prepared before a schema change.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        return queryset.explain(analyze=True)
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql} /* {label} */", params)
+        return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+
+
+def write_report(report, path=None, stdout=None):
+    output = json.dumps(report, indent=2, default=str)
+    if path:
+        with open(path, "w") as file:
+            file.write(output + "\n")
+    elif stdout is not None:
+        stdout.write(output)
+    return output
@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from store.benchmarks import QueryTimer, measure, summarize
+from store.models import Book
+from store.serializer import BookSerializer
+from store.views import BookViewSet
+
+
+def profile_request(send):
+    """Status, query count and query time of one request sent by ``send``."""
+    timer = QueryTimer()
+    with connection.execute_wrapper(timer):
+        response = send()
+    return {
+        "status": response.status_code,
+        "queries": timer.count,
+        "query_ms": round(timer.seconds * 1000, 3),
+    }
+
+
+def serialization_ms(instances, many, repeat):
+    latencies = measure(lambda: BookSerializer(instances, many=many).data, repeat)
+    return summarize(latencies)
+
+
+def run(repeat=20, **options):
+    """
+    Profile the book endpoints through the full Django/DRF stack.
+
+    Response caching is disabled, except for the ``list_cached`` case. Relation PATCHes toggle the like of one book.
+    """
+    book = Book.objects.order_by("id")[Book.objects.count() // 2]
+    user = User.objects.filter(userbookrelation__isnull=False).first() or User.objects.first()
+    client = APIClient()
+    client.force_login(user)
+    relation_url = reverse("userbookrelation-detail", args=(book.id,))
+    toggle = {"like": False}
+
+    def patch_relation():
+        toggle["like"] = not toggle["like"]
+        return client.patch(relation_url, data=json.dumps(toggle), content_type="application/json")
+
+    list_url = reverse("book-list")
+    cases = {
+        "list": lambda: client.get(list_url),
+        "list_cached": lambda: client.get(list_url),
+        "retrieve": lambda: client.get(reverse("book-detail", args=(book.id,))),
+        "search": lambda: client.get(list_url, data={"search": book.author}),
+        "ordering": lambda: client.get(list_url, data={"ordering": "-price"}),
+        "relation_patch": patch_relation,
+    }
+
+    report = {}
+    for name, send in cases.items():
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            STORE_RESPONSE_CACHE_TIMEOUT=300 if name == "list_cached" else 0,
+        ):
+            send()
+            report[name] = profile_request(send)
+            report[name]["latency"] = summarize(measure(send, repeat))
+
+    page = list(BookViewSet.queryset.all()[:20])
+    start = time.perf_counter()
+    instance = BookViewSet.queryset.get(pk=book.pk)
+    report["retrieve"]["fetch_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    report["list"]["serialization"] = serialization_ms(page, True, repeat)
+    report["retrieve"]["serialization"] = serialization_ms(instance, False, repeat)
+    return report
@@ -0,0 +1,46 @@
+from store.benchmarks import measure, summarize
+from store.compression import available_encoders, get_encoder
+from store.renderers import ColumnarJSONRenderer, FastJSONRenderer
+from store.rows import RowSerializer
+from store.serializer import BookSerializer
+from store.views import BookViewSet
+
+PAGE_SIZE = 100
+
+
+def run(repeat=20, **options):
+    """
+    Bytes on the wire and encode cost of a book list page.
+
+    A ``PAGE_SIZE`` page of the list, as served by the API, is rendered as
+    JSON and as columnar JSON, and every rendering is compressed with every
+    available encoding. Times are per page, the ratio is against plain JSON.
+    The compressed size is what goes on the wire, render plus compress time
+    is the CPU it costs.
+    """
+    row_serializer = RowSerializer(BookSerializer)
+    rows = row_serializer.rows(BookViewSet.queryset.all(), "id")[:PAGE_SIZE]
+    data = {"next": None, "previous": None, "results": row_serializer.to_representation(rows)}
+
+    report = {"rows": len(data["results"]), "encodings": sorted(available_encoders())}
+    baseline = None
+    for renderer in (FastJSONRenderer(), ColumnarJSONRenderer()):
+        body = renderer.render(data)
+        baseline = baseline or len(body)
+        results = {
+            "identity": {
+                "bytes": len(body),
+                "ratio": round(len(body) / baseline, 3),
+                "render": summarize(measure(lambda: renderer.render(data), repeat)),
+            }
+        }
+        for name in report["encodings"]:
+            encoder = get_encoder(name)
+            compressed = encoder.compress(body)
+            results[name] = {
+                "bytes": len(compressed),
+                "ratio": round(len(compressed) / baseline, 3),
+                "compress": summarize(measure(lambda: encoder.compress(body), repeat)),
+            }
+        report[renderer.format] = results
+    return report
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from store.benchmarks import summarize
+
+# The views run in other threads, which only see committed rows.
+COMMITTED_DATA = True
+
+
+def wsgi_request(handler, path, client_delay):
+    """One request through the WSGI handler, sending the body to a slow client."""
+    status = []
+
+    def start_response(line, headers, exc_info=None):
+        status.append(line)
+
+    response = handler(RequestFactory().get(path).environ, start_response)
+    try:
+        for _ in response:
+            time.sleep(client_delay)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_request(handler, path, client_delay):
+    """One request through the ASGI handler, sending the body to a slow client."""
+    status = []
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif not message.get("more_body"):
+            await asyncio.sleep(client_delay)
+
+    await handler(scope, receive, send)
+    return status[0]
+
+
+def report(latencies, statuses, seconds):
+    return dict(
+        summarize(latencies),
+        throughput_rps=round(len(latencies) / seconds, 1),
+        errors=sum(status != 200 for status in statuses),
+    )
+
+
+def run_wsgi(path, concurrency, requests, workers, client_delay):
+    """``concurrency`` clients sharing ``workers`` threads, like a threaded WSGI server."""
+    handler = WSGIHandler()
+    latencies, statuses = [], []
+
+    with ThreadPoolExecutor(workers) as server:
+
+        def client():
+            for _ in range(requests):
+                start = time.perf_counter()
+                statuses.append(server.submit(wsgi_request, handler, path, client_delay).result())
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as clients:
+            for future in [clients.submit(client) for _ in range(concurrency)]:
+                future.result()
+        return report(latencies, statuses, time.perf_counter() - start)
+
+
+def run_asgi(path, concurrency, requests, workers, client_delay):
+    """``concurrency`` clients on one event loop, the views offloaded to ``workers`` threads."""
+    handler = ASGIHandler()
+    latencies, statuses = [], []
+
+    async def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            statuses.append(await asgi_request(handler, path, client_delay))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def clients():
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    with override_settings(STORE_ASYNC_THREADS=workers):
+        start = time.perf_counter()
+        asyncio.run(clients())
+        return report(latencies, statuses, time.perf_counter() - start)
+
+
+def run(repeat=20, concurrency=50, workers=8, client_delay=50, **options):
+    """
+    Throughput of the book list under slow client load, WSGI against ASGI.
+
+    Every one of ``concurrency`` clients sends ``repeat`` requests in a row
+    and takes ``client_delay`` ms to receive each response. Both servers get
+    ``workers`` threads: the WSGI one holds a thread for the whole request,
+    the ASGI one only for the view, while the event loop feeds the clients.
+    """
+    results = {
+        "concurrency": concurrency,
+        "workers": workers,
+        "client_delay_ms": client_delay,
+        "requests": concurrency * repeat,
+    }
+    args = (concurrency, repeat, workers, client_delay / 1000)
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], STORE_RESPONSE_CACHE_TIMEOUT=0
+    ):
+        results["wsgi"] = run_wsgi(reverse("book-list"), *args)
+        results["asgi"] = run_asgi(reverse("async-book-list"), *args)
+    return results
@@ -0,0 +1,62 @@
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from store.benchmarks import explain, measure, summarize
+from store.models import Book, UserBookRelation
+from store.views import BookViewSet
+
+
+def query_shapes():
+    """The hot query shapes of the store API, as ``name -> queryset`` pairs."""
+    queryset = BookViewSet.queryset.all()
+    price = Book.objects.order_by("price").values_list("price", flat=True)[
+        Book.objects.count() // 2
+    ]
+    author, book_id = Book.objects.order_by("author", "id").values_list("author", "id")[
+        Book.objects.count() // 2
+    ]
+    liked_book = UserBookRelation.objects.filter(like=True).values_list("book", flat=True)[:1]
+    return {
+        "list_by_id": queryset.order_by("id")[:20],
+        "filter_price": queryset.filter(price=price).order_by("id")[:20],
+        "seek_by_price": queryset.filter(price__gt=price).order_by("price", "id")[:20],
+        "seek_by_author": queryset.filter(
+            Q(author__gt=author) | Q(author=author, id__gt=book_id)
+        ).order_by("author", "id")[:20],
+        "book_likes": UserBookRelation.objects.filter(book__in=liked_book, like=True)
+        .values("book")
+        .annotate(likes=Count("pk")),
+        "book_rating": UserBookRelation.objects.filter(book__in=liked_book, rate__isnull=False)
+        .values("book")
+        .annotate(rates=Count("pk")),
+    }
+
+
+def measure_shapes(repeat, label):
+    results = {}
+    for name, queryset in query_shapes().items():
+        results[name] = {
+            "plan": explain(queryset, label),
+            "latency": summarize(measure(lambda: list(queryset.all()), repeat)),
+        }
+    return results
+
+
+def run(repeat=20, **options):
+    """
+    EXPLAIN and time the query shapes with and without the store indexes.
+
+    The "before" pass drops the indexes declared on the store models inside
+    a transaction that is rolled back afterwards.
+    """
+    indexes = [(model, index) for model in (Book, UserBookRelation) for index in model._meta.indexes]
+    report = {"vendor": connection.vendor, "indexes": [index.name for _, index in indexes]}
+    report["after"] = measure_shapes(repeat, "after")
+    with transaction.atomic():
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                cursor.execute(str(index.remove_sql(model, schema_editor)))
+        report["before"] = measure_shapes(repeat, "before")
+        transaction.set_rollback(True)
+    return report
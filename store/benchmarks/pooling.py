@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from store.backends.pool import ConnectionPool
+from store.benchmarks import summarize
+
+# Opens its own connections, no catalog needed.
+COMMITTED_DATA = True
+
+
+def connector(connect_delay):
+    """
+    Open a new driver connection to the default database.
+
+    ``connect_delay`` seconds are added to every connect, standing in for the
+    TCP, TLS and authentication round trips of a remote PostgreSQL when the
+    benchmark runs against a local or SQLite database.
+    """
+    params = connection.get_connection_params()
+
+    def connect():
+        if connect_delay:
+            time.sleep(connect_delay)
+        return connection.get_new_connection(params)
+
+    return connect
+
+
+def query(raw):
+    cursor = raw.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def run_clients(request, concurrency, requests):
+    latencies = []
+
+    def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            request()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as clients:
+        for future in [clients.submit(client) for _ in range(concurrency)]:
+            future.result()
+    seconds = time.perf_counter() - start
+    return dict(summarize(latencies), throughput_rps=round(len(latencies) / seconds, 1))
+
+
+def run(repeat=20, concurrency=50, workers=8, connect_delay=0, **options):
+    """
+    Per request connection overhead, a new connection per request against a pool.
+
+    Every one of ``concurrency`` clients runs ``repeat`` requests of one
+    ``SELECT 1``. Unpooled, each request connects and disconnects like Django
+    with ``CONN_MAX_AGE = 0``; pooled, it checks a connection out of a pool of
+    ``workers`` connections and gives it back.
+    """
+    connect = connector(connect_delay / 1000)
+
+    def unpooled():
+        raw = connect()
+        try:
+            query(raw)
+        finally:
+            raw.close()
+
+    connections = ConnectionPool(connect, max_size=workers, timeout=60)
+
+    def pooled():
+        raw = connections.acquire()
+        try:
+            query(raw)
+        finally:
+            connections.release(raw)
+
+    results = {
+        "vendor": connection.vendor,
+        "concurrency": concurrency,
+        "pool_size": workers,
+        "connect_delay_ms": connect_delay,
+        "requests": concurrency * repeat,
+        "unpooled": run_clients(unpooled, concurrency, repeat),
+    }
+    try:
+        results["pooled"] = run_clients(pooled, concurrency, repeat)
+        results["pool"] = connections.stats()
+    finally:
+        connections.clear()
+    results["speedup"] = round(
+        results["pooled"]["throughput_rps"] / results["unpooled"]["throughput_rps"], 2
+    )
+    return results
@@ -0,0 +1,39 @@
+from store.benchmarks import measure, summarize
+from store.renderers import FastJSONRenderer
+from store.rows import RowSerializer
+from store.serializer import BookSerializer
+from store.views import BookViewSet
+
+
+def rows_per_second(latencies, rows):
+    return round(rows / (summarize(latencies)["p50_ms"] / 1000)) if rows else 0
+
+
+def run(repeat=20, **options):
+    """
+    Serialize the whole annotated catalog with ``BookSerializer`` and with the
+    ``RowSerializer`` fast path, fetching excluded, and compare rows/sec.
+    """
+    queryset = BookViewSet.queryset.all()
+    instances = list(queryset)
+    row_serializer = RowSerializer(BookSerializer)
+    rows = list(row_serializer.rows(queryset))
+
+    cases = {
+        "book_serializer": lambda: BookSerializer(instances, many=True).data,
+        "row_serializer": lambda: row_serializer.to_representation(rows),
+    }
+    report = {"rows": len(rows)}
+    for name, serialize in cases.items():
+        latencies = measure(serialize, repeat)
+        report[name] = dict(summarize(latencies), rows_per_second=rows_per_second(latencies, len(rows)))
+
+    renderer = FastJSONRenderer()
+    report["identical"] = renderer.render(cases["book_serializer"]()) == renderer.render(
+        cases["row_serializer"]()
+    )
+    if report["row_serializer"]["p50_ms"]:
+        report["speedup"] = round(
+            report["book_serializer"]["p50_ms"] / report["row_serializer"]["p50_ms"], 2
+        )
+    return report
@@ -0,0 +1,146 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from store.routers import read_from_replica
+
+CACHE_ALIAS = getattr(settings, "STORE_CACHE_ALIAS", "default")
+
+GENERATION_KEY = "store:version:generation"
+CATALOG_VERSION_KEY = "store:version:catalog"
+# Moved by changes of the searchable book fields only, see store.search.
+SEARCH_VERSION_KEY = "store:version:search"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def record(event, count=1):
+    with _stats_lock:
+        _stats[event] += count
+
+
+def stats():
+    with _stats_lock:
+        return {event: _stats[event] for event in ("hits", "misses", "invalidations")}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def book_version_key(book_id):
+    return f"store:version:book:{book_id}"
+
+
+def get_versions(*keys):
+    """
+    Current value of the version counters ``keys``.
+
+    Missing counters start from the current time rather than from 1, so an
+    evicted counter can never come back to a version that was already used.
+    """
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*keys):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+    record("invalidations")
+
+
+def _invalidate(keys, using=None):
+    # Bump right away so this process stops serving the old data, and again on
+    # commit so nothing cached from a read racing the transaction survives it.
+    bump_versions(*keys)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_versions(*keys), using=using)
+
+
+def invalidate_books(book_ids, using=None):
+    """Invalidate cached detail responses of ``book_ids`` and every list response."""
+    _invalidate([CATALOG_VERSION_KEY, *map(book_version_key, book_ids)], using)
+
+
+def invalidate_search(using=None):
+    """Invalidate the search index, for changes of book names and authors."""
+    _invalidate([SEARCH_VERSION_KEY], using)
+
+
+def invalidate_all(using=None):
+    """Invalidate every cached response, for writes that bypass model signals."""
+    _invalidate([GENERATION_KEY], using)
+
+
+def response_cache_key(request, view_name, versions, extra=()):
+    params = sorted(request.query_params.lists())
+    digest = hashlib.sha1(
+        repr((request.build_absolute_uri(request.path), params, tuple(extra))).encode("utf-8")
+    ).hexdigest()
+    return "store:response:{}:{}:{}".format(view_name, ".".join(map(str, versions)), digest)
+
+
+class CachedResponseMixin:
+    """
+    Cache ``list`` and ``retrieve`` response data under versioned keys.
+
+    List responses depend on the catalog version and detail responses on the
+    version of their book; both are bumped from the model signals, so a write
+    is never followed by a stale response. The cached value is the response
+    data, rendering still follows content negotiation. Responses read from a
+    replica are not stored. A ``STORE_RESPONSE_CACHE_TIMEOUT`` of 0 disables
+    the cache.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(CATALOG_VERSION_KEY, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        book_id = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return self.cached_response(
+            book_version_key(book_id), super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_key_extra(self, request):
+        """Extra values the cached response depends on, besides the URL."""
+        return ()
+
+    def cached_response(self, version_key, view, request, *args, **kwargs):
+        timeout = getattr(settings, "STORE_RESPONSE_CACHE_TIMEOUT", 300)
+        if not timeout:
+            return view(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(
+            request,
+            f"{self.basename}-{self.action}",
+            get_versions(GENERATION_KEY, version_key),
+            self.get_cache_key_extra(request),
+        )
+        data = cache.get(key)
+        if data is not None:
+            record("hits")
+            return Response(data)
+
+        record("misses")
+        response = view(request, *args, **kwargs)
+        # A lagging replica may not have the writes the versions count yet.
+        if response.status_code == 200 and not read_from_replica():
+            cache.set(key, response.data, timeout)
+        return response
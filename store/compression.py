@@ -0,0 +1,183 @@
+"""
+Negotiated response compression.
+
+``CompressionMiddleware`` compresses responses of the
+``STORE_COMPRESSION_TYPES`` content types that are at least
+``STORE_COMPRESSION_MIN_SIZE`` bytes long, with the best encoding the client
+accepts: brotli (``br``) and zstandard (``zstd``) when their packages are
+installed, gzip always. Server preference follows
+``STORE_COMPRESSION_ENCODINGS`` among the encodings of equal ``q`` value.
+Streaming responses are compressed chunk by chunk, flushed after each one.
+
+HTML is left out of the default types: a page that reflects user input next
+to a secret (the CSRF token) would be open to BREACH style attacks.
+"""
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from store.instrumentation import span
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+ACCEPT_ENCODING_RE = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+DEFAULT_TYPES = (
+    "application/json",
+    "application/vnd.store.columnar+json",
+    "application/x-ndjson",
+    "text/csv",
+)
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self, chunks):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, level=4):
+        self.level = level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self, chunks):
+        compressor = brotli.Compressor(quality=self.level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level=3):
+        self.level = level
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self, chunks):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def available_encoders():
+    """Encoder classes by name, those whose package is installed."""
+    encoders = {"gzip": GzipEncoder}
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    return encoders
+
+
+def get_encoder(name):
+    levels = getattr(settings, "STORE_COMPRESSION_LEVELS", {})
+    encoder_class = available_encoders()[name]
+    return encoder_class(levels[name]) if name in levels else encoder_class()
+
+
+def parse_accept_encoding(header):
+    """``{encoding: q}`` of an ``Accept-Encoding`` header, invalid entries skipped."""
+    accepted = {}
+    for entry in header.split(","):
+        match = ACCEPT_ENCODING_RE.match(entry)
+        if match is None:
+            continue
+        name, q = match.groups()
+        try:
+            accepted[name.lower()] = float(q) if q is not None else 1.0
+        except ValueError:
+            continue
+    return accepted
+
+
+def negotiate(header, preference=None):
+    """The preferred encoding acceptable to the client, None for identity."""
+    if preference is None:
+        preference = getattr(settings, "STORE_COMPRESSION_ENCODINGS", ["br", "zstd", "gzip"])
+    accepted = parse_accept_encoding(header)
+    available = available_encoders()
+    best, best_q = None, 0.0
+    for name in preference:
+        if name not in available:
+            continue
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type in getattr(settings, "STORE_COMPRESSION_TYPES", DEFAULT_TYPES)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < getattr(
+            settings, "STORE_COMPRESSION_MIN_SIZE", 1024
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        name = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if name is None:
+            return response
+        encoder = get_encoder(name)
+
+        if response.streaming:
+            response.streaming_content = encoder.stream(response.streaming_content)
+            # The compressed size is only known once it is streamed.
+            del response["Content-Length"]
+        else:
+            with span("compress"):
+                content = encoder.compress(response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response["Content-Length"] = str(len(content))
+
+        # A strong ETag promises byte equality, which the encodings break.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = name
+        return response
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified validators for ``list`` and ``retrieve``.
+
+    Validators are computed from ``Book.updated_at``, which relation writes
+    touch as well, with a single query that neither joins relations nor
+    serializes anything. A matching ``If-None-Match``/``If-Modified-Since``
+    gets a ``304 Not Modified`` before the cached or annotated data is read.
+    """
+
+    def list(self, request, *args, **kwargs):
+        validators = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        )
+        return self.conditional_response(
+            validators["last_modified"], validators["count"], super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last_modified = (
+                self.get_queryset()
+                .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            last_modified = None
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(last_modified, 1, super().retrieve, request, *args, **kwargs)
+
+    def get_etag_extra(self, request):
+        """Extra values the representation depends on, besides the URL and the data."""
+        return ()
+
+    def conditional_response(self, last_modified, count, view, request, *args, **kwargs):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        etag = quote_etag(
+            hashlib.sha1(
+                repr(
+                    (
+                        request.get_full_path(),
+                        request.accepted_media_type,
+                        last_modified and last_modified.isoformat(),
+                        count,
+                        tuple(self.get_etag_extra(request)),
+                    )
+                ).encode("utf-8")
+            ).hexdigest()
+        )
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,110 @@
+import bisect
+import itertools
+import random
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from store.cache import invalidate_all
+from store.logic import rebuild_counters
+from store.models import Book, UserBookRelation
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_catalog(
+    books=1000,
+    users=100,
+    relations=10000,
+    like_ratio=0.3,
+    bookmark_ratio=0.1,
+    rate_ratio=0.2,
+    rate_weights=(1, 1, 1, 1, 1),
+    popularity_skew=0.0,
+    batch_size=5000,
+    seed=0,
+):
+    """
+    Bulk insert a synthetic catalog and return the created book ids.
+
+    Rows are tagged with a random prefix so several catalogs can coexist.
+    Every user gets an even share of ``relations`` over distinct books, a
+    ``popularity_skew`` above 0 picks books with Zipf-like weights
+    (``1 / rank ** skew``) so a few books get most of the relations. Rates
+    are drawn with ``rate_weights`` for 1 to 5. Counters are recomputed once
+    at the end instead of per relation.
+    """
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    relations = min(relations, books * users)
+
+    with transaction.atomic():
+        for batch in _batches((User(username=f"{tag}-{i}") for i in range(users)), batch_size):
+            User.objects.bulk_create(batch)
+        user_ids = list(
+            User.objects.filter(username__startswith=f"{tag}-").values_list("pk", flat=True)
+        )
+
+        catalog = (
+            Book(
+                name=f"{tag} Book {i}",
+                author=f"Author {rng.randrange(max(books // 10, 1))}",
+                price=Decimal(rng.randrange(100, 10000)) / 100,
+                discount=Decimal(rng.randrange(0, 100)) / 100,
+            )
+            for i in range(books)
+        )
+        for batch in _batches(catalog, batch_size):
+            Book.objects.bulk_create(batch)
+        book_ids = list(Book.objects.filter(name__startswith=f"{tag} ").values_list("pk", flat=True))
+
+        popularity = list(
+            itertools.accumulate(1 / (rank + 1) ** popularity_skew for rank in range(len(book_ids)))
+        )
+
+        def pick_books(count):
+            if not popularity_skew:
+                return rng.sample(book_ids, count)
+            picked = set()
+            for _ in range(count * 4):
+                position = bisect.bisect(popularity, rng.random() * popularity[-1])
+                picked.add(book_ids[min(position, len(book_ids) - 1)])
+                if len(picked) == count:
+                    return picked
+            # Heavy skews rarely reach the tail, top up uniformly.
+            remaining = list(set(book_ids) - picked)
+            return picked | set(rng.sample(remaining, count - len(picked)))
+
+        def generate_relations():
+            for position, user_id in enumerate(user_ids):
+                share = relations // users + (position < relations % users)
+                for book_id in pick_books(share):
+                    yield UserBookRelation(
+                        user_id=user_id,
+                        book_id=book_id,
+                        like=rng.random() < like_ratio,
+                        in_bookmarks=rng.random() < bookmark_ratio,
+                        rate=(
+                            rng.choices(range(1, 6), weights=rate_weights)[0]
+                            if rng.random() < rate_ratio
+                            else None
+                        ),
+                    )
+
+        for batch in _batches(generate_relations(), batch_size):
+            UserBookRelation.objects.bulk_create(batch)
+
+        rebuild_counters(Book.objects.filter(pk__in=book_ids))
+        invalidate_all()
+    return book_ids
@@ -0,0 +1,35 @@
+from django.conf import settings
+
+from store.rows import RowSerializer
+
+EXPORT_CHUNK_SIZE = getattr(settings, "STORE_EXPORT_CHUNK_SIZE", 2000)
+
+
+def iter_batches(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Iterate ``queryset`` in lists of ``chunk_size`` rows without caching it.
+
+    Rows are fetched through a server-side cursor on PostgreSQL.
+    """
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) == chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_rows(queryset, serializer_class, renderer, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield ``queryset`` serialized like ``serializer_class`` and encoded by
+    ``renderer``, one batch at a time. The first chunk carries the header of
+    formats that have one.
+    """
+    row_serializer = RowSerializer(serializer_class)
+    context = {"header": True, "fields": row_serializer.names}
+    yield renderer.render([], renderer_context=context)
+    context["header"] = False
+    for batch in iter_batches(row_serializer.rows(queryset), chunk_size):
+        yield renderer.render(row_serializer.to_representation(batch), renderer_context=context)
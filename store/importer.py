@@ -0,0 +1,171 @@
+import csv
+import json
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from store import leaderboards
+from store.cache import invalidate_all
+from store.models import Book
+from store.serializer import BookImportSerializer
+
+IMPORT_BATCH_SIZE = getattr(settings, "STORE_IMPORT_BATCH_SIZE", 1000)
+MAX_REPORTED_ERRORS = 100
+
+
+
+def read_csv(lines):
+    """
+    ``(line, row, error)`` of a CSV stream with a header row. A row the csv
+    module rejects, e.g. a field over ``csv.field_size_limit()``, is reported
+    and the rows after it are still read.
+    """
+    consumed = 0
+
+    def count(lines):
+        nonlocal consumed
+        for line in lines:
+            consumed += 1
+            yield line
+
+    # reader.line_num is not advanced for a line that raised csv.Error.
+    reader = csv.DictReader(count(lines))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield consumed, None, {"non_field_errors": [str(exc)]}
+            continue
+        yield consumed, row, None
+
+
+def read_jsonl(lines):
+    """``(line, row, error)`` of a JSON lines stream, blank lines are skipped."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {"non_field_errors": [f"Invalid JSON: {exc}"]}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {"non_field_errors": ["Expected a JSON object."]}
+            continue
+        yield number, row, None
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class UTF8Lines:
+    """
+    The lines of a binary stream decoded as UTF-8. A line that is not valid
+    UTF-8 is decoded with replacement characters and its number remembered,
+    so that the row it belongs to can be rejected.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.invalid = deque()
+
+    def __iter__(self):
+        for number, line in enumerate(iter(self.stream.readline, b""), start=1):
+            try:
+                yield line.decode("utf-8")
+            except UnicodeDecodeError:
+                self.invalid.append(number)
+                yield line.decode("utf-8", errors="replace")
+
+    def has_invalid(self, first, last):
+        """Whether one of the lines ``first`` to ``last`` was invalid, earlier ones are forgotten."""
+        while self.invalid and self.invalid[0] < first:
+            self.invalid.popleft()
+        return bool(self.invalid) and self.invalid[0] <= last
+
+
+def read_stream(reader, stream):
+    """
+    ``(line, row, error)`` of ``reader``, one of ``READERS``, over a UTF-8
+    binary stream. Rows read from invalid UTF-8 are reported as errors.
+    """
+    lines = UTF8Lines(stream)
+    first = 1
+    for line, row, errors in reader(lines):
+        if errors is None and lines.has_invalid(first, line):
+            row, errors = None, {"non_field_errors": ["Invalid UTF-8."]}
+        first = line + 1
+        yield line, row, errors
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+def insert_batch(batch, report):
+    """
+    ``bulk_create`` a batch in a savepoint. If the database rejects it, the
+    rows are retried one by one, each in its own savepoint, so only the
+    offending rows are reported.
+    """
+    try:
+        with transaction.atomic():
+            Book.objects.bulk_create([book for _, book in batch])
+        report.created += len(batch)
+        return
+    except DatabaseError:
+        pass
+    for line, book in batch:
+        try:
+            with transaction.atomic():
+                Book.objects.bulk_create([book])
+            report.created += 1
+        except DatabaseError as exc:
+            report.add_error(line, {"non_field_errors": [str(exc)]})
+
+
+def import_books(rows, owner=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate ``(line, row, error)`` tuples from a reader and insert the books.
+
+    Rows are validated with ``BookImportSerializer`` and inserted in batches
+    of ``batch_size`` as they are read, so the file is never held in memory
+    and an invalid row does not abort the rest of it. Returns the number of
+    created books, of failed rows and the first errors with their line.
+    """
+    report = ImportReport()
+    batch = []
+    for line, data, errors in rows:
+        if errors is None:
+            serializer = BookImportSerializer(data=data)
+            if serializer.is_valid():
+                batch.append((line, Book(owner=owner, **serializer.validated_data)))
+            else:
+                errors = serializer.errors
+        if errors is not None:
+            report.add_error(line, errors)
+        if len(batch) >= batch_size:
+            insert_batch(batch, report)
+            batch = []
+    if batch:
+        insert_batch(batch, report)
+
+    if report.created:
+        # bulk_create sends no signals.
+        invalidate_all()
+        leaderboards.invalidate()
+    return report.as_dict()
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("store_request_metrics", default=None)
+
+# "IN (%s, %s, %s)" has the same shape whatever the number of parameters.
+PLACEHOLDER_LIST_RE = re.compile(r"\((?:%s, )+%s\)")
+
+
+def query_shape(sql):
+    return PLACEHOLDER_LIST_RE.sub("(%s, ...)", sql)
+
+
+class RequestMetrics:
+    """Queries, database time and named spans of one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes = Counter()
+        self.spans = defaultdict(float)
+        self.started = time.perf_counter()
+        self.total_seconds = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+            self.shapes[query_shape(sql)] += 1
+
+    def add_span(self, name, seconds):
+        self.spans[name] += seconds
+
+    def repeated_queries(self, threshold=None):
+        """Query shapes run at least ``threshold`` times, the N+1 suspects."""
+        if threshold is None:
+            threshold = getattr(settings, "STORE_N_PLUS_ONE_THRESHOLD", 5)
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self.started
+
+    def server_timing(self):
+        entries = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"']
+        entries += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items()]
+        entries.append(f"total;dur={self.total_seconds * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Count the query in the metrics of the current request, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install(sender=None, connection=None, **kwargs):
+    """
+    ``connection_created`` receiver adding ``execute_wrapper`` to the connection.
+
+    The request metrics live in a context variable rather than on the
+    connections, so queries are seen from whatever thread runs them, including
+    the thread pool of the async views.
+    """
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+@contextmanager
+def span(name):
+    """Time the block as ``name`` in the metrics of the current request, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_span(name, time.perf_counter() - start)
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record(view_name, metrics, repeated):
+    with _stats_lock:
+        stats = _stats.setdefault(view_name, Counter())
+        stats["requests"] += 1
+        stats["queries"] += metrics.queries
+        stats["db_ms"] += metrics.db_seconds * 1000
+        stats["total_ms"] += metrics.total_seconds * 1000
+        stats["n_plus_one"] += bool(repeated)
+        for name, seconds in metrics.spans.items():
+            stats[f"{name}_ms"] += seconds * 1000
+
+
+def stats():
+    """Per view totals and averages of every instrumented request so far."""
+    with _stats_lock:
+        snapshot = {view: dict(values) for view, values in _stats.items()}
+    for values in snapshot.values():
+        requests = values["requests"]
+        for key in [key for key in values if key != "requests"]:
+            values[f"avg_{key}"] = round(values[key] / requests, 3)
+    return snapshot
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, database time, serialization and render time per view.
+
+    The numbers are sent back in a ``Server-Timing`` header (unless
+    ``STORE_SERVER_TIMING`` is off), aggregated per view for
+    ``store.instrumentation.stats()`` and logged at debug level. Query shapes
+    repeated ``STORE_N_PLUS_ONE_THRESHOLD`` times in one request are logged
+    as N+1 suspects. Works in both the WSGI and the ASGI handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Marks the instance as a coroutine function for Django's handler.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, metrics, response)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, metrics, response)
+
+    def finish(self, request, metrics, response):
+        metrics.finish()
+        match = request.resolver_match
+        view_name = match.view_name if match else "unresolved"
+        repeated = metrics.repeated_queries()
+        for shape, count in repeated.items():
+            logger.warning("Possible N+1 in %s: %d x %s", view_name, count, shape)
+        record(view_name, metrics, repeated)
+        logger.debug("%s %s: %s", request.method, view_name, metrics.server_timing())
+        if getattr(settings, "STORE_SERVER_TIMING", True):
+            response["Server-Timing"] = metrics.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: metrics.add_span("render", time.perf_counter() - start)
+            )
+        return response
@@ -0,0 +1,155 @@
+"""
+In-process top-K leaderboards of the books, per counter.
+
+Each board keeps the best ``STORE_LEADERBOARD_SIZE`` books plus as many
+again as slack, sorted by ``(-value, id)``. It is built with one indexed
+``ORDER BY ... LIMIT`` query on first use, then kept up to date from
+``store.logic.apply_deltas`` and the book signals once their transaction
+commits. Every book left out of a board is known to rank below its
+``floor``: a book that rises above it is inserted, a tracked book that falls
+below it is dropped, and when fewer than ``size`` books remain the board is
+rebuilt on the next read. Boards are also rebuilt every
+``STORE_LEADERBOARD_TTL`` seconds, which bounds how long writes made by other
+processes go unseen. Reads cost O(K) and run no aggregation.
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from store.models import Book
+
+METRICS = {
+    "liked": "likes_count",
+    "bookmarked": "bookmarks_count",
+    "rated": "rating_score",
+}
+
+
+def get_size():
+    return getattr(settings, "STORE_LEADERBOARD_SIZE", 50)
+
+
+class Leaderboard:
+    def __init__(self, field, size):
+        self.field = field
+        self.size = size
+        self.capacity = size * 2
+        self.lock = threading.Lock()
+        self.keys = []
+        self.tracked = {}
+        # Every untracked book ranks below ``floor``, None when all are tracked.
+        self.floor = None
+        self.built_at = None
+
+    def is_stale(self):
+        if self.built_at is None:
+            return True
+        return time.monotonic() - self.built_at > getattr(settings, "STORE_LEADERBOARD_TTL", 60)
+
+    def rebuild(self):
+        rows = Book.objects.order_by(f"-{self.field}", "id").values_list("id", self.field)
+        keys = [(-value, book_id) for book_id, value in rows[: self.capacity]]
+        with self.lock:
+            self.keys = keys
+            self.tracked = {key[1]: key for key in keys}
+            self.floor = keys[-1] if len(keys) == self.capacity else None
+            self.built_at = time.monotonic()
+
+    def top(self, limit=None):
+        """Ids of the ``limit`` best books, best first."""
+        if self.is_stale():
+            self.rebuild()
+        with self.lock:
+            return [book_id for _, book_id in self.keys[: limit or self.size]]
+
+    def _untrack(self, book_id):
+        key = self.tracked.pop(book_id, None)
+        if key is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+        return key
+
+    def update(self, book_id, value):
+        with self.lock:
+            if self.built_at is None:
+                return
+            old = self._untrack(book_id)
+            key = (-value, book_id)
+            if self.floor is None or key < self.floor:
+                bisect.insort(self.keys, key)
+                self.tracked[book_id] = key
+                if len(self.keys) > self.capacity:
+                    dropped = self.keys[self.capacity:]
+                    del self.keys[self.capacity:]
+                    for _, dropped_id in dropped:
+                        del self.tracked[dropped_id]
+                    self.floor = dropped[0]
+            elif old is not None and len(self.keys) < self.size:
+                self.built_at = None
+
+    def remove(self, book_id):
+        with self.lock:
+            if self._untrack(book_id) is not None and self.floor is not None:
+                if len(self.keys) < self.size:
+                    self.built_at = None
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def get_leaderboard(metric):
+    """The board of ``metric``, one of ``METRICS``; raises KeyError otherwise."""
+    field = METRICS[metric]
+    with _boards_lock:
+        if metric not in _boards:
+            _boards[metric] = Leaderboard(field, get_size())
+        return _boards[metric]
+
+
+def _built_boards():
+    return [board for board in list(_boards.values()) if board.built_at is not None]
+
+
+def update_books(book_ids):
+    """Feed the current values of ``book_ids`` to the boards once the transaction commits."""
+    boards = _built_boards()
+    if not boards or not book_ids:
+        return
+    fields = sorted({board.field for board in boards})
+    rows = list(Book.objects.filter(pk__in=book_ids).values_list("id", *fields))
+
+    def apply():
+        for board in boards:
+            index = fields.index(board.field) + 1
+            for row in rows:
+                board.update(row[0], row[index])
+
+    transaction.on_commit(apply)
+
+
+def book_created(book):
+    boards = _built_boards()
+    if boards:
+        values = [(board, getattr(book, board.field)) for board in boards]
+        transaction.on_commit(lambda: [board.update(book.pk, value) for board, value in values])
+
+
+def book_deleted(book_id):
+    boards = _built_boards()
+    if boards:
+        transaction.on_commit(lambda: [board.remove(book_id) for board in boards])
+
+
+def invalidate():
+    """Rebuild every board on its next read, after bulk counter changes."""
+    for board in list(_boards.values()):
+        board.built_at = None
+
+
+def reset():
+    """Drop every board, for tests."""
+    with _boards_lock:
+        _boards.clear()
@@ -0,0 +1,213 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.expressions import ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from store import leaderboards
+from store.cache import invalidate_books
+from store.models import Book, UserBookRelation, rating_prior
+
+RELATION_STATE_FIELDS = ("book_id", "like", "in_bookmarks", "rate")
+RELATION_FIELDS = ("like", "in_bookmarks", "rate")
+
+
+def relation_state(relation):
+    return {field: getattr(relation, field) for field in RELATION_STATE_FIELDS}
+
+
+def relation_counters(like, in_bookmarks, rate):
+    """Contribution of a single relation to the counters of its book."""
+    counters = {
+        "likes_count": int(bool(like)),
+        "bookmarks_count": int(bool(in_bookmarks)),
+        "rating_sum": int(rate) if rate is not None else 0,
+        "rating_count": int(rate is not None),
+    }
+    for value, field in enumerate(Book.RATING_FIELDS, start=1):
+        counters[field] = int(rate is not None and int(rate) == value)
+    return counters
+
+
+def rating_score(rating_sum, rating_count):
+    """
+    Bayesian average rating: the mean of the ratings plus ``weight`` votes of
+    ``mean`` (``STORE_RATING_PRIOR_MEAN`` and ``STORE_RATING_PRIOR_WEIGHT``),
+    so a single 5 does not outrank a thousand 4s. Takes numbers or expressions.
+    """
+    mean, weight = rating_prior()
+    score = (float(mean) * weight + rating_sum) / (weight + rating_count)
+    if hasattr(score, "resolve_expression"):
+        return ExpressionWrapper(score, output_field=FloatField())
+    return score
+
+
+def relation_deltas(old, new):
+    """
+    Counter deltas per book for a relation going from ``old`` to ``new``.
+
+    Both states are dicts with ``book_id``, ``like``, ``in_bookmarks`` and
+    ``rate`` keys, ``None`` stands for a missing relation.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(Book.COUNTER_FIELDS, 0))
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        counters = relation_counters(state["like"], state["in_bookmarks"], state["rate"])
+        for field, value in counters.items():
+            deltas[state["book_id"]][field] += sign * value
+    return deltas
+
+
+def merge_deltas(target, deltas):
+    for book_id, delta in deltas.items():
+        for field, value in delta.items():
+            target[book_id][field] += value
+    return target
+
+
+def apply_deltas(deltas):
+    """
+    Apply counter deltas with ``UPDATE ... SET x = x + d`` statements.
+
+    Books sharing the same delta are updated together, so a batch of likes
+    costs one statement whatever its size. The rating score is recomputed in
+    the same statement from the pre-update counters plus the deltas, as the
+    ``SET`` expressions all see the old row. ``updated_at`` is touched even
+    when the counters do not move, it is what the conditional GET
+    validators see of relation changes.
+    """
+    groups = defaultdict(list)
+    for book_id, delta in deltas.items():
+        groups[tuple(sorted(delta.items()))].append(book_id)
+
+    now = timezone.now()
+    for delta, book_ids in groups.items():
+        changes = {field: F(field) + value for field, value in delta if value}
+        delta = dict(delta)
+        if delta["rating_sum"] or delta["rating_count"]:
+            changes["rating_score"] = rating_score(
+                F("rating_sum") + delta["rating_sum"], F("rating_count") + delta["rating_count"]
+            )
+        Book.objects.filter(pk__in=book_ids).update(updated_at=now, **changes)
+    leaderboards.update_books(list(deltas))
+
+
+def lock_relations(user_id, book_ids):
+    """
+    Lock the relations of ``user_id`` with ``book_ids``, creating missing ones.
+
+    Missing relations are inserted blank with ``ON CONFLICT DO NOTHING``, so
+    concurrent writers never duplicate a (user, book) pair, then every row is
+    read ``FOR UPDATE``: the returned state is the one the caller's changes
+    apply to, which keeps the counter deltas exact. Must run in a
+    transaction. Returns ``({book_id: relation}, created book ids)``, books
+    that do not exist are left out.
+    """
+    queryset = UserBookRelation.objects.select_for_update().filter(user_id=user_id)
+    relations = {relation.book_id: relation for relation in queryset.filter(book_id__in=book_ids)}
+    missing = set(book_ids) - set(relations)
+    if missing:
+        missing = set(Book.objects.filter(pk__in=missing).values_list("pk", flat=True))
+        UserBookRelation.objects.bulk_create(
+            [UserBookRelation(user_id=user_id, book_id=book_id) for book_id in missing],
+            ignore_conflicts=True,
+        )
+        relations.update(
+            (relation.book_id, relation) for relation in queryset.filter(book_id__in=missing)
+        )
+    return relations, missing
+
+
+def apply_relation_changes(changes):
+    """
+    Apply relation changes of several users, ``{(user_id, book_id): fields}``.
+
+    Relations are locked (and created) user by user in id order, saved with a
+    single bulk update, and the counter deltas of all of them are applied
+    together. Changes for books that no longer exist are dropped. Must run in
+    a transaction. Returns ``({(user_id, book_id): relation}, created keys)``.
+    """
+    book_ids = defaultdict(list)
+    for user_id, book_id in changes:
+        book_ids[user_id].append(book_id)
+
+    relations, created = {}, set()
+    for user_id in sorted(book_ids):
+        user_relations, created_ids = lock_relations(user_id, book_ids[user_id])
+        relations.update(((user_id, book_id), relation) for book_id, relation in user_relations.items())
+        created.update((user_id, book_id) for book_id in created_ids)
+
+    deltas = defaultdict(lambda: dict.fromkeys(Book.COUNTER_FIELDS, 0))
+    for key, fields in changes.items():
+        relation = relations.get(key)
+        if relation is None:
+            continue
+        old = relation_state(relation)
+        for field, value in fields.items():
+            setattr(relation, field, value)
+        merge_deltas(deltas, relation_deltas(old, relation_state(relation)))
+
+    UserBookRelation.objects.bulk_update(list(relations.values()), RELATION_FIELDS)
+    apply_deltas(deltas)
+    invalidate_books(deltas)
+    return relations, created
+
+
+def bulk_update_relations(user_id, items, pending=None):
+    """
+    Apply validated relation changes of ``user_id`` in one transaction.
+
+    ``items`` are ``UserBookRelationSerializer`` validated dicts, fields an
+    item leaves out keep their current value and later items for the same
+    book win. ``pending`` fields by book id, the queued write-behind toggles,
+    are applied under the items. Returns the resulting relations and whether
+    each was created, in input order, ``(None, False)`` for a book deleted
+    since the items were validated.
+    """
+    changes = {(user_id, book_id): dict(fields) for book_id, fields in (pending or {}).items()}
+    for item in items:
+        item = dict(item)
+        changes.setdefault((user_id, item.pop("book").pk), {}).update(item)
+
+    with transaction.atomic():
+        relations, created = apply_relation_changes(changes)
+
+    return [
+        (relations.get((user_id, item["book"].pk)), (user_id, item["book"].pk) in created)
+        for item in items
+    ]
+
+
+def _relation_aggregate(aggregate, **filters):
+    relations = (
+        UserBookRelation.objects.filter(book=OuterRef("pk"), **filters)
+        .order_by()
+        .values("book")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+    return Coalesce(Subquery(relations), 0)
+
+
+def rebuild_counters(queryset=None):
+    """Recompute the counters and rating score of ``queryset`` books from scratch."""
+    if queryset is None:
+        queryset = Book.objects.all()
+    histogram = {
+        field: _relation_aggregate(Count("pk"), rate=value)
+        for value, field in enumerate(Book.RATING_FIELDS, start=1)
+    }
+    updated = queryset.update(
+        likes_count=_relation_aggregate(Count("pk"), like=True),
+        bookmarks_count=_relation_aggregate(Count("pk"), in_bookmarks=True),
+        rating_sum=_relation_aggregate(Sum("rate"), rate__isnull=False),
+        rating_count=_relation_aggregate(Count("pk"), rate__isnull=False),
+        updated_at=timezone.now(),
+        **histogram,
+    )
+    queryset.update(rating_score=rating_score(F("rating_sum"), F("rating_count")))
+    leaderboards.invalidate()
+    return updated
@@ -0,0 +1,86 @@
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from store import throttling
+from store.benchmarks import write_report
+from store.datagen import generate_catalog
+
+SUITES = ["api", "compression", "concurrency", "indexes", "pooling", "serializer"]
+
+
+def sizes(value):
+    return [int(size) for size in value.split(",")]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a store benchmark suite and print its JSON report. With --books a "
+        "synthetic catalog is generated for every size and rolled back afterwards, "
+        "otherwise the suite runs once against the existing data. Suites serving "
+        "requests from other threads only run against the existing data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("suite", choices=SUITES)
+        parser.add_argument(
+            "--books", type=sizes, default=[], help="Comma separated catalog sizes, e.g. 1000,100000."
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--relations",
+            type=int,
+            help="Relations of every catalog, defaults to --relations-per-book times its size.",
+        )
+        parser.add_argument("--relations-per-book", type=float, default=10)
+        parser.add_argument("--popularity-skew", type=float, default=1.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients.")
+        parser.add_argument("--workers", type=int, default=8, help="Server threads.")
+        parser.add_argument(
+            "--client-delay", type=float, default=50, help="Time a client takes to read a response, in ms."
+        )
+        parser.add_argument(
+            "--connect-delay",
+            type=float,
+            default=0,
+            help="Time added to every new connection, in ms, to stand in for a remote database.",
+        )
+        parser.add_argument("--output", help="Write the report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        # The benchmarks hammer the API from one client on purpose.
+        with throttling.bypassed():
+            self.run_suite(**options)
+
+    def run_suite(self, suite, books, users, relations, relations_per_book, output, **options):
+        if any(size < 1 for size in books):
+            raise CommandError("--books sizes must be positive.")
+        module = import_module(f"store.benchmarks.{suite}")
+        report = {"suite": suite, "runs": []}
+        if getattr(module, "COMMITTED_DATA", False):
+            if books:
+                raise CommandError(
+                    f"The {suite} suite runs against the existing data, use generate_catalog first."
+                )
+            report["runs"].append({"dataset": {}, "results": module.run(**options)})
+            write_report(report, output, self.stdout)
+            return
+        for size in books or [None]:
+            with transaction.atomic():
+                dataset = {}
+                if size:
+                    dataset = {
+                        "books": size,
+                        "users": users,
+                        "relations": relations or int(size * relations_per_book),
+                        "popularity_skew": options["popularity_skew"],
+                        "seed": options["seed"],
+                    }
+                    generate_catalog(**dataset)
+                results = module.run(**options)
+                report["runs"].append({"dataset": dataset, "results": results})
+                transaction.set_rollback(True)
+        write_report(report, output, self.stdout)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from store.export import EXPORT_CHUNK_SIZE, stream_rows
+from store.renderers import CSVRenderer, JSONLinesRenderer
+from store.serializer import BookSerializer
+from store.views import BookViewSet
+
+RENDERERS = {"csv": CSVRenderer, "jsonl": JSONLinesRenderer}
+
+
+class Command(BaseCommand):
+    help = "Stream the whole catalog, as served by the book API, to a CSV or JSON lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(RENDERERS), default="jsonl")
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, format, output, chunk_size, **options):
+        queryset = BookViewSet.queryset.order_by("id")
+        chunks = stream_rows(queryset, BookSerializer, RENDERERS[format](), chunk_size)
+        if output:
+            with open(output, "wb") as file:
+                file.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode("utf-8"), ending="")
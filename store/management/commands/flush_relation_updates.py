@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store import writebehind
+
+
+class Command(BaseCommand):
+    help = "Apply the like/bookmark toggles queued by the database write-behind mode."
+
+    def handle(self, *args, **options):
+        if not isinstance(writebehind.get_queue(), writebehind.DatabaseQueue):
+            raise CommandError('Only the STORE_WRITE_BEHIND = "database" queue outlives its process.')
+        applied = writebehind.flush()
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} queued relation updates."))
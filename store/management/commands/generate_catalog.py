@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.datagen import generate_catalog
+
+
+def ratio(value):
+    value = float(value)
+    if not 0 <= value <= 1:
+        raise ValueError(value)
+    return value
+
+
+def weights(value):
+    values = [float(weight) for weight in value.split(",")]
+    if len(values) != 5:
+        raise ValueError(value)
+    return values
+
+
+class Command(BaseCommand):
+    help = "Bulk generate a synthetic catalog of books, users and book relations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--relations", type=int, default=10000)
+        parser.add_argument("--like-ratio", type=ratio, default=0.3)
+        parser.add_argument("--bookmark-ratio", type=ratio, default=0.1)
+        parser.add_argument("--rate-ratio", type=ratio, default=0.2)
+        parser.add_argument(
+            "--rate-weights",
+            type=weights,
+            default=(1, 1, 1, 1, 1),
+            help="Comma separated weights of the rates 1 to 5.",
+        )
+        parser.add_argument(
+            "--popularity-skew",
+            type=float,
+            default=0.0,
+            help="Zipf exponent of book popularity, 0 for uniform.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if min(options["books"], options["users"]) < 1:
+            raise CommandError("--books and --users must be positive.")
+        book_ids = generate_catalog(
+            books=options["books"],
+            users=options["users"],
+            relations=options["relations"],
+            like_ratio=options["like_ratio"],
+            bookmark_ratio=options["bookmark_ratio"],
+            rate_ratio=options["rate_ratio"],
+            rate_weights=options["rate_weights"],
+            popularity_skew=options["popularity_skew"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Generated {len(book_ids)} books."))
@@ -0,0 +1,35 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from store.importer import IMPORT_BATCH_SIZE, READERS, import_books, read_stream
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a CSV (with a header row) or JSON lines file of books into the "
+        "catalog in batches and print a JSON report of the created and failed rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=sorted(READERS), help="Defaults to the file extension.")
+        parser.add_argument("--owner", help="Username owning the imported books.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, path, format, owner, batch_size, **options):
+        format = format or os.path.splitext(path)[1].lstrip(".").lower()
+        if format not in READERS:
+            raise CommandError(f"Unknown format {format!r}, use --format.")
+        if owner is not None:
+            try:
+                owner = User.objects.get(username=owner)
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user {owner!r}.")
+
+        with open(path, "rb") as file:
+            rows = read_stream(READERS[format], file)
+            report = import_books(rows, owner=owner, batch_size=batch_size)
+        self.stdout.write(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from store.cache import invalidate_all
+from store.logic import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized like/bookmark/rating counters of every book."
+
+    def handle(self, *args, **options):
+        updated = rebuild_counters()
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters of {updated} books."))
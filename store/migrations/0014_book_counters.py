@@ -0,0 +1,58 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Book = apps.get_model('store', 'Book')
+    UserBookRelation = apps.get_model('store', 'UserBookRelation')
+
+    def relation_aggregate(aggregate, **filters):
+        relations = (
+            UserBookRelation.objects.filter(book=OuterRef('pk'), **filters)
+            .order_by()
+            .values('book')
+            .annotate(value=aggregate)
+            .values('value')
+        )
+        return Coalesce(Subquery(relations), 0)
+
+    Book.objects.update(
+        likes_count=relation_aggregate(Count('pk'), like=True),
+        bookmarks_count=relation_aggregate(Count('pk'), in_bookmarks=True),
+        rating_sum=relation_aggregate(Sum('rate'), rate__isnull=False),
+        rating_count=relation_aggregate(Count('pk'), rate__isnull=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_book_discount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='bookmarks_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:44
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_relations(apps, schema_editor):
+    """
+    Fold duplicated (user, book) relations into the oldest row.
+
+    The merged row is liked/bookmarked if any duplicate was, and keeps the
+    most recent rate. Counters of the affected books are recomputed.
+    """
+    Book = apps.get_model('store', 'Book')
+    UserBookRelation = apps.get_model('store', 'UserBookRelation')
+
+    duplicates = (
+        UserBookRelation.objects.values('user', 'book')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    book_ids = set()
+    for pair in duplicates.iterator():
+        relations = list(
+            UserBookRelation.objects.filter(user=pair['user'], book=pair['book']).order_by('id')
+        )
+        kept, extra = relations[0], relations[1:]
+        kept.like = any(relation.like for relation in relations)
+        kept.in_bookmarks = any(relation.in_bookmarks for relation in relations)
+        rates = [relation.rate for relation in relations if relation.rate is not None]
+        kept.rate = rates[-1] if rates else None
+        kept.save(update_fields=['like', 'in_bookmarks', 'rate'])
+        UserBookRelation.objects.filter(pk__in=[relation.pk for relation in extra]).delete()
+        book_ids.add(pair['book'])
+
+    if not book_ids:
+        return
+
+    def relation_aggregate(aggregate, **filters):
+        relations = (
+            UserBookRelation.objects.filter(book=OuterRef('pk'), **filters)
+            .order_by()
+            .values('book')
+            .annotate(value=aggregate)
+            .values('value')
+        )
+        return Coalesce(Subquery(relations), 0)
+
+    Book.objects.filter(pk__in=book_ids).update(
+        likes_count=relation_aggregate(Count('pk'), like=True),
+        bookmarks_count=relation_aggregate(Count('pk'), in_bookmarks=True),
+        rating_sum=relation_aggregate(Sum('rate'), rate__isnull=False),
+        rating_count=relation_aggregate(Count('pk'), rate__isnull=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_relations, migrations.RunPython.noop),
+    ]
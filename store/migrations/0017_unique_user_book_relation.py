@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_merge_duplicate_relations'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='userbookrelation',
+            constraint=models.UniqueConstraint(fields=('user', 'book'), name='unique_user_book_relation'),
+        ),
+    ]
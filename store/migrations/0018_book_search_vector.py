@@ -0,0 +1,56 @@
+# Generated by Django 3.2.3 on 2026-10-18 19:46
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION store_book_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_book_search_vector
+    BEFORE INSERT OR UPDATE OF name, author, search_vector ON store_book
+    FOR EACH ROW EXECUTE PROCEDURE store_book_search_vector();
+
+UPDATE store_book SET search_vector = NULL;
+
+CREATE INDEX store_book_search_vector_gin ON store_book USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS store_book_search_vector_gin;
+DROP TRIGGER IF EXISTS store_book_search_vector ON store_book;
+DROP FUNCTION IF EXISTS store_book_search_vector();
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    # Other databases search through store.search.InvertedIndex.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_unique_user_book_relation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0019_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRelationUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('like', models.BooleanField(null=True)),
+                ('in_bookmarks', models.BooleanField(null=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pendingrelationupdate',
+            constraint=models.UniqueConstraint(fields=('user', 'book'), name='unique_pending_relation_update'),
+        ),
+    ]
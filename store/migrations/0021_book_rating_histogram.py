@@ -0,0 +1,76 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:55
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery
+from django.db.models.expressions import ExpressionWrapper
+from django.db.models.functions import Coalesce
+import store.models
+
+
+def fill_rating_histogram(apps, schema_editor):
+    Book = apps.get_model('store', 'Book')
+    UserBookRelation = apps.get_model('store', 'UserBookRelation')
+
+    def rate_count(rate):
+        relations = (
+            UserBookRelation.objects.filter(book=OuterRef('pk'), rate=rate)
+            .order_by()
+            .values('book')
+            .annotate(value=Count('pk'))
+            .values('value')
+        )
+        return Coalesce(Subquery(relations), 0)
+
+    Book.objects.update(**{f'rating_{rate}_count': rate_count(rate) for rate in range(1, 6)})
+    mean, weight = store.models.rating_prior()
+    Book.objects.update(
+        rating_score=ExpressionWrapper(
+            (float(mean) * weight + F('rating_sum')) / (weight + F('rating_count')),
+            output_field=FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_pending_relation_update'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_score',
+            field=models.FloatField(default=store.models.default_rating_score),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['rating_score', 'id'], name='store_book_rating_score_id_idx'),
+        ),
+        migrations.RunPython(fill_rating_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.3 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0021_book_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['likes_count', 'id'], name='store_book_likes_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['bookmarks_count', 'id'], name='store_book_bookmarks_id_idx'),
+        ),
+    ]
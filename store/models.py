@@ -1,18 +1,80 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 
+def rating_prior():
+    """``(mean, weight)`` of the Bayesian rating score, ``weight`` must be positive."""
+    return (
+        getattr(settings, "STORE_RATING_PRIOR_MEAN", 3.0),
+        getattr(settings, "STORE_RATING_PRIOR_WEIGHT", 10),
+    )
+
+
+def default_rating_score():
+    return float(rating_prior()[0])
+
+
 class Book(models.Model):
+    RATING_FIELDS = tuple(f"rating_{rate}_count" for rate in range(1, 6))
+    COUNTER_FIELDS = ("likes_count", "bookmarks_count", "rating_sum", "rating_count") + RATING_FIELDS
+    # Maintained by the database (F() deltas and the search vector trigger).
+    MAINTAINED_FIELDS = COUNTER_FIELDS + ("rating_score", "search_vector")
+
     name = models.CharField(max_length=256)
     price = models.DecimalField(max_digits=7, decimal_places=2)
     discount = models.DecimalField(max_digits=7, decimal_places=2)
     author = models.CharField(max_length=256)
     owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='my_books')
     readers = models.ManyToManyField(User, through='UserBookRelation', related_name='books')
+    likes_count = models.PositiveIntegerField(default=0)
+    bookmarks_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    # Rating distribution, one count per UserBookRelation.RATE_CHOICE.
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    # Bayesian average, see store.logic.rating_score.
+    rating_score = models.FloatField(default=default_rating_score)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Seek pagination of the list endpoint, see store.pagination.
+            models.Index(fields=["price", "id"], name="store_book_price_id_idx"),
+            models.Index(fields=["author", "id"], name="store_book_author_id_idx"),
+            models.Index(fields=["rating_score", "id"], name="store_book_rating_score_id_idx"),
+            # Leaderboard rebuilds, see store.leaderboards.
+            models.Index(fields=["likes_count", "id"], name="store_book_likes_id_idx"),
+            models.Index(fields=["bookmarks_count", "id"], name="store_book_bookmarks_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Counters are only ever changed by F() deltas from store.logic and the
+        # search vector by a trigger, a regular save of a (possibly stale)
+        # instance must not write them back.
+        if not self._state.adding and self.pk and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class UserBookRelation(models.Model):
     RATE_CHOICE = (
@@ -30,5 +92,55 @@ class UserBookRelation(models.Model):
     in_bookmarks = models.BooleanField(default=False)
     rate = models.PositiveSmallIntegerField(choices=RATE_CHOICE, null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "book"], name="unique_user_book_relation"),
+        ]
+        indexes = [
+            # Per book counter aggregates, see store.logic.rebuild_counters.
+            models.Index(
+                fields=["book"],
+                condition=models.Q(like=True),
+                name="store_relation_like_idx",
+            ),
+            models.Index(
+                fields=["book"],
+                condition=models.Q(in_bookmarks=True),
+                name="store_relation_bookmark_idx",
+            ),
+            models.Index(
+                fields=["book", "rate"],
+                condition=models.Q(rate__isnull=False),
+                name="store_relation_rate_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"user: {self.user.username}, book: {self.book}, rate: {self.rate}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The book counters are updated from the post_save handler, keep both
+        # writes in the same transaction.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class PendingRelationUpdate(models.Model):
+    """A like/bookmark toggle acknowledged but not applied yet, see store.writebehind."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    # None leaves the relation field as it is.
+    like = models.BooleanField(null=True)
+    in_bookmarks = models.BooleanField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "book"], name="unique_pending_relation_update"),
+        ]
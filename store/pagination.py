@@ -0,0 +1,202 @@
+import datetime
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the queryset ordering plus ``id``.
+
+    Pages are fetched with a ``WHERE (price, id) > (:price, :id)`` style
+    predicate instead of OFFSET, so page 10,000 costs the same as page 1.
+    The ordering is taken from the queryset, which keeps it compatible with
+    ``OrderingFilter``; the ordered fields must not be nullable. Cursor tokens
+    are signed and bound to the ordering they were issued for.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    tiebreaker = "id"
+    signing_salt = "store.pagination.keyset"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            position, reverse = cursor
+            queryset = queryset.filter(self.seek(position, reverse))
+
+        order_by = [
+            ("-" if descending != reverse else "") + field
+            for field, descending in self.ordering
+        ]
+        results = list(queryset.order_by(*order_by)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """Return the ordering as ``(field, descending)`` pairs ending with the tiebreaker."""
+        ordering = []
+        for term in queryset.query.order_by or (self.tiebreaker,):
+            if not isinstance(term, str) or term == "?":
+                raise ValueError(f"{self.__class__.__name__} can only seek on field orderings.")
+            field = term.lstrip("-")
+            ordering.append(("id" if field == "pk" else field, term.startswith("-")))
+            if ordering[-1][0] == self.tiebreaker:
+                return ordering
+        ordering.append((self.tiebreaker, ordering[-1][1]))
+        return ordering
+
+    def seek(self, position, reverse):
+        """Lexicographic ``(a, b, ...) > (x, y, ...)`` predicate for ``position``."""
+        predicate = Q()
+        equal = {}
+        for (field, descending), value in zip(self.ordering, position):
+            lookup = "lt" if descending != reverse else "gt"
+            predicate |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return predicate
+
+    def get_position(self, item):
+        return [encode_value(getattr(item, field)) for field, _ in self.ordering]
+
+    def encode_cursor(self, item, reverse):
+        token = signing.dumps(
+            {"o": self.ordering_key(), "p": self.get_position(item), "r": reverse},
+            salt=self.signing_salt,
+            compress=True,
+        )
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = signing.loads(token, salt=self.signing_salt)
+            position, reverse = cursor["p"], bool(cursor["r"])
+            valid = cursor["o"] == self.ordering_key() and len(position) == len(self.ordering)
+        except (signing.BadSignature, KeyError, TypeError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def ordering_key(self):
+        return [("-" if descending else "") + field for field, descending in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+def encode_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the PostgreSQL planner estimate for big tables.
+
+    ``COUNT(*)`` has to scan the whole table (or index) on PostgreSQL, which
+    makes the admin changelist of a table with millions of rows take seconds
+    before anything is shown. The row estimate of the query plan is used
+    instead when it is at least ``estimate_threshold``, below that, and on
+    other databases, the exact count is used.
+    """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate_count()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+        return super().count
+
+    def estimate_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
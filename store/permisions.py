@@ -7,5 +7,6 @@ class IsOwnerOrReadOnly(BasePermission):
             request.method in SAFE_METHODS
             or request.user
             and request.user.is_authenticated
-            and (obj.owner == request.user or request.user.is_staff)
+            # owner_id, comparing obj.owner would fetch the owner.
+            and (obj.owner_id == request.user.id or request.user.is_staff)
         )
@@ -0,0 +1,123 @@
+import csv
+import io
+import operator
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """Compact UTF-8 JSON, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_encoder.default)
+    return _encoder.encode(data).encode("utf-8")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is available.
+
+    Indented output (``Accept: application/json; indent=4``) is left to the
+    stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def is_tabular(rows):
+    """Whether ``rows`` is a list of objects that all have the same keys, in order."""
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return False
+    fields = list(rows[0]) if rows else []
+    return all(list(row) == fields for row in rows)
+
+
+def to_columns(rows):
+    """A list of objects as ``{"fields": [...], "rows": [[...], ...]}``."""
+    fields = list(rows[0]) if rows else []
+    if len(fields) < 2:
+        return {"fields": fields, "rows": [[row[field] for field in fields] for row in rows]}
+    # Tuples are encoded as arrays.
+    return {"fields": fields, "rows": list(map(operator.itemgetter(*fields), rows))}
+
+
+class ColumnarJSONRenderer(BaseRenderer):
+    """
+    Compact JSON for lists: field names sent once, every object as an array.
+
+    Selected with ``Accept: application/vnd.store.columnar+json`` or
+    ``?format=columnar``. A list, or the ``results`` of a paginated response,
+    becomes ``{"fields": [...], "rows": [[...], ...]}`` next to the other
+    pagination keys. Error responses and lists whose objects differ in their
+    keys are rendered as plain JSON.
+    """
+
+    media_type = "application/vnd.store.columnar+json"
+    format = "columnar"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        response = (renderer_context or {}).get("response")
+        if response is not None and response.exception:
+            return dumps(data)
+        if is_tabular(data):
+            data = to_columns(data)
+        elif isinstance(data, dict) and is_tabular(data.get("results")):
+            results = data["results"]
+            data = {key: value for key, value in data.items() if key != "results"}
+            data.update(to_columns(results))
+        return dumps(data)
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """Newline delimited JSON, one object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "jsonl"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(dumps(row) + b"\n" for row in rows)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    A list of flat objects as CSV rows, ``None`` as an empty cell.
+
+    The columns are ``renderer_context["fields"]``, or the keys of the first
+    row. The header row is written unless ``renderer_context["header"]`` is
+    false, which lets a stream render its batches separately.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        rows = data if isinstance(data, list) else [data]
+        fields = renderer_context.get("fields") or (list(rows[0]) if rows else [])
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fields, extrasaction="ignore", lineterminator="\n")
+        if renderer_context.get("header", True):
+            writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue().encode(self.charset)
@@ -0,0 +1,177 @@
+"""
+Read replica routing of the book and relation queries.
+
+Reads of ``ROUTED_MODELS`` made while serving a safe (GET, HEAD, OPTIONS)
+request go to one of the ``STORE_READ_REPLICAS`` database aliases, picked at
+random per request. Everything else uses ``default``: writes, reads made
+while serving other methods (the lookups of an update included), reads in a
+transaction, and queries outside of a request (management commands,
+background threads).
+
+Replicas lag behind the primary, so a user who wrote a book or a relation
+reads from the primary for ``STORE_REPLICA_STICKY_SECONDS`` afterwards. The
+marker lives in the default cache, which must be shared by the processes
+(memcached, redis, database) for a write served by one process to be seen
+by the next request served by another; with the per process default,
+``LocMemCache``, the ``store.W001`` check warns. Responses built from replica
+reads are not stored in the response cache, where they could outlive a
+version bump they missed.
+"""
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_MODELS = {"store.book", "store.userbookrelation"}
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_KEY = "store:replica:primary:{}"
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+}
+
+_current = ContextVar("store_replica_routing", default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, "STORE_READ_REPLICAS", []))
+
+
+def sticky_key(user_pk):
+    return STICKY_KEY.format(user_pk)
+
+
+def user_pk(request):
+    user = getattr(request, "user", None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class RoutingState:
+    """The database choice of one request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = None
+        self.sticky = None
+        self.written_by = None
+        self.wrote = request.method not in SAFE_METHODS
+
+    def read_alias(self):
+        replicas = get_replicas()
+        if not replicas or self.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if self.sticky is None:
+            # request.user is only known once DRF authenticated the request,
+            # hence checked on the first routed read rather than up front.
+            pk = user_pk(self.request)
+            self.sticky = pk is not None and bool(cache.get(sticky_key(pk)))
+        if self.sticky:
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            self.replica = random.choice(replicas)
+        return self.replica
+
+    def written(self):
+        self.wrote = True
+        if self.written_by is None:
+            self.written_by = user_pk(self.request)
+
+
+def read_from_replica():
+    """Whether the current request read routed models from a replica."""
+    state = _current.get()
+    return state is not None and state.replica is not None
+
+
+def is_routed(model):
+    return model._meta.label_lower in ROUTED_MODELS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not is_routed(model):
+            return None
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None and is_routed(model):
+            state.written()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication.
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Scope ``ReplicaRouter`` to the request and make the user who wrote
+    through it sticky to the primary. Works in both the WSGI and the ASGI
+    handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Marks the instance as a coroutine function for Django's handler.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(state, response)
+
+    def finish(self, state, response):
+        if state.written_by is not None and get_replicas():
+            cache.set(
+                sticky_key(state.written_by),
+                True,
+                getattr(settings, "STORE_REPLICA_STICKY_SECONDS", 5),
+            )
+        return response
+
+
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get("BACKEND")
+    if get_replicas() and backend in PROCESS_LOCAL_CACHES:
+        return [
+            checks.Warning(
+                "Read replicas are configured with a cache local to the process, "
+                "users may not read their own writes when served by several processes.",
+                hint="Use a cache shared by the processes (CACHE_BACKEND, CACHE_LOCATION).",
+                id="store.W001",
+            )
+        ]
+    return []
@@ -0,0 +1,112 @@
+import decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from store.instrumentation import span
+
+
+def compile_decimal(field):
+    """``field.to_representation`` with the quantization set up once."""
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or not coerce_to_string or field.localize:
+        return field.to_representation
+
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+    Decimal = decimal.Decimal
+
+    def to_representation(value):
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value).strip())
+        return "{:f}".format(value.quantize(exponent, rounding=rounding, context=context))
+
+    return to_representation
+
+
+def compile_field(field):
+    if isinstance(field, serializers.DecimalField):
+        return compile_decimal(field)
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.CharField:
+        return str
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Read-only serializer of ``values_list(named=True)`` rows.
+
+    Produces the same data as ``serializer_class`` for the same rows, but the
+    fields are introspected once and every row is formatted in a single loop,
+    without model instances or per field ``get_attribute`` calls. Only fields
+    with a plain, single attribute source are supported.
+    """
+
+    def __init__(self, serializer_class):
+        self.columns = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or len(field.source_attrs) != 1:
+                raise ImproperlyConfigured(
+                    f"{self.__class__.__name__} cannot serialize {serializer_class.__name__}.{name}."
+                )
+            self.columns.append((name, field.source, compile_field(field)))
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.columns]
+
+    @property
+    def sources(self):
+        return [source for _, source, _ in self.columns]
+
+    def rows(self, queryset, *extra):
+        """``queryset`` as named rows of the serialized sources plus ``extra`` fields."""
+        fields = list(dict.fromkeys([*self.sources, *extra]))
+        return queryset.values_list(*fields, named=True)
+
+    def to_representation(self, rows):
+        columns = [(name, formatter) for name, _, formatter in self.columns]
+        return [
+            {
+                name: None if value is None else formatter(value)
+                for (name, formatter), value in zip(columns, row)
+            }
+            for row in rows
+        ]
+
+    def serialize(self, rows):
+        with span("serialize"):
+            return self.to_representation(rows)
+
+
+class RowListMixin:
+    """Serve ``list`` from named rows through a ``RowSerializer``."""
+
+    _row_serializers = {}
+
+    def get_row_serializer(self):
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in self._row_serializers:
+            self._row_serializers[serializer_class] = RowSerializer(serializer_class)
+        return self._row_serializers[serializer_class]
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        # The pagination reads the ordered fields from the rows.
+        ordering = [term.lstrip("-") for term in queryset.query.order_by if isinstance(term, str)]
+        rows = row_serializer.rows(queryset, *ordering, "id")
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(rows))
@@ -0,0 +1,132 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+from store.cache import GENERATION_KEY, SEARCH_VERSION_KEY, get_versions
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Relative weight of the indexed fields, the same A/B split as the
+# PostgreSQL search vector maintained by the store_book_search_vector trigger.
+FIELD_WEIGHTS = {"name": 1.0, "author": 0.4}
+SEARCH_FIELDS = tuple(FIELD_WEIGHTS)
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    In-process prefix index of book names and authors.
+
+    Used instead of the PostgreSQL search vector on other databases (SQLite
+    in tests and development).
+    """
+
+    def __init__(self, rows):
+        postings = defaultdict(lambda: defaultdict(float))
+        for book_id, *values in rows:
+            for (field, weight), value in zip(FIELD_WEIGHTS.items(), values):
+                for token in tokenize(value or ""):
+                    postings[token][book_id] += weight
+        self.postings = {token: dict(books) for token, books in postings.items()}
+        self.vocabulary = sorted(self.postings)
+
+    def search(self, words):
+        """Score of the books matching every word, as a prefix of a token."""
+        scores = None
+        for word in words:
+            matches = defaultdict(float)
+            position = bisect.bisect_left(self.vocabulary, word)
+            for token in self.vocabulary[position:]:
+                if not token.startswith(word):
+                    break
+                for book_id, weight in self.postings[token].items():
+                    matches[book_id] += weight
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    book_id: scores[book_id] + matches[book_id]
+                    for book_id in scores.keys() & matches.keys()
+                }
+        return scores or {}
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_inverted_index(model, using):
+    """
+    The inverted index of ``model``, rebuilt when a name or an author changed.
+    Likes, bookmarks and ratings leave it as it is.
+    """
+    global _index, _index_version
+    version = (using, *get_versions(GENERATION_KEY, SEARCH_VERSION_KEY))
+    with _index_lock:
+        if _index is None or _index_version != version:
+            rows = model._default_manager.using(using).values_list("pk", *SEARCH_FIELDS)
+            _index, _index_version = InvertedIndex(rows.iterator()), version
+        return _index
+
+
+class BookSearchFilter(SearchFilter):
+    """
+    Ranked full-text search on book name and author.
+
+    On PostgreSQL matches come from the GIN indexed ``search_vector`` column,
+    elsewhere from an in-process inverted index. Every search term has to
+    match the beginning of a word. The queryset is always annotated with
+    ``search_rank``, so relevance can be used as an ordering field.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        words = [word for term in self.get_search_terms(request) for word in tokenize(term)]
+        return search_books(queryset, words)
+
+
+def search_books(queryset, words):
+    """
+    Filter ``queryset`` to the books matching every word and annotate it with
+    ``search_rank``, 0 for every book when there are no words.
+
+    Without PostgreSQL the ranks are passed as query parameters, three per
+    match, so only the ``STORE_SEARCH_MAX_MATCHES`` best matches are kept to
+    stay under SQLite's limit of 999 variables.
+    """
+    if not words:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connections[queryset.db].vendor == "postgresql":
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words), search_type="raw", config="simple"
+        )
+        # ts_rank() is a float4, the keyset cursor compares double precision.
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+        )
+
+    scores = get_inverted_index(queryset.model, queryset.db).search(words)
+    limit = getattr(settings, "STORE_SEARCH_MAX_MATCHES", 300)
+    if len(scores) > limit:
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        scores = dict(best)
+    return queryset.filter(pk__in=scores).annotate(
+        search_rank=Case(
+            *(When(pk=book_id, then=Value(score)) for book_id, score in scores.items()),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
@@ -1,22 +1,134 @@
+from django.conf import settings
 from django.db.models.aggregates import Count
 from django.db.models.expressions import Case, When
 from rest_framework import serializers
 
+from store.instrumentation import span
 from store.models import Book, UserBookRelation
 
+BULK_RELATIONS_LIMIT = getattr(settings, "STORE_BULK_RELATIONS_LIMIT", 1000)
 
-class BookSerializer(serializers.ModelSerializer):
-    annotated_likes = serializers.IntegerField(read_only=True)
-    annotated_in_bookmarks = serializers.IntegerField(read_only=True)
+
+class TimedDataMixin:
+    """Counts building ``data`` as the "serialize" span of the current request."""
+
+    @property
+    def data(self):
+        with span("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+
+class BookSerializer(TimedDataMixin, serializers.ModelSerializer):
+    annotated_likes = serializers.IntegerField(source="likes_count", read_only=True)
+    annotated_in_bookmarks = serializers.IntegerField(source="bookmarks_count", read_only=True)
     discount_price = serializers.DecimalField(max_digits=7, decimal_places=2, read_only=True)
     rating = serializers.DecimalField(max_digits=3, decimal_places=2, read_only=True)
+    rating_score = serializers.DecimalField(max_digits=3, decimal_places=2, read_only=True)
 
     class Meta:
         model = Book
-        fields = ("id", "name", "price", "discount", "annotated_likes", "annotated_in_bookmarks", "discount_price", "rating")
+        fields = (
+            "id", "name", "price", "discount", "annotated_likes", "annotated_in_bookmarks",
+            "discount_price", "rating", "rating_score",
+        )
+        list_serializer_class = TimedListSerializer
+
+
+class BookUserStateSerializer(BookSerializer):
+    """A book with the caller's own relation state, null when there is no relation."""
+
+    user_like = serializers.BooleanField(read_only=True)
+    user_in_bookmarks = serializers.BooleanField(read_only=True)
+    user_rate = serializers.IntegerField(read_only=True)
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ("user_like", "user_in_bookmarks", "user_rate")
+
+
+class BookImportSerializer(BookSerializer):
+    """A row of a bulk import, see store.importer."""
+
+    class Meta(BookSerializer.Meta):
+        fields = ("name", "price", "discount", "author")
+        extra_kwargs = {"author": {"required": False, "allow_blank": True}}
+
+
+class RatingDistributionField(serializers.Field):
+    """``{"1": count, ..., "5": count}`` from the rating counters of a book."""
 
+    def __init__(self, **kwargs):
+        super().__init__(source="*", read_only=True, **kwargs)
+
+    def to_representation(self, book):
+        return {
+            str(rate): getattr(book, field) for rate, field in enumerate(Book.RATING_FIELDS, start=1)
+        }
+
+
+class BookDetailSerializer(BookSerializer):
+    rating_distribution = RatingDistributionField()
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ("rating_distribution",)
+
+
+class BookPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Resolves books from ``context["books"]`` when they were loaded up front."""
+
+    def to_internal_value(self, data):
+        books = self.context.get("books")
+        if books is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            book = books.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if book is None:
+            self.fail("does_not_exist", pk_value=data)
+        return book
+
+
+class UserBookRelationSerializer(TimedDataMixin, serializers.ModelSerializer):
+    book = BookPrimaryKeyField(queryset=Book.objects.all())
 
-class UserBookRelationSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserBookRelation
         fields = ("book", "like", "in_bookmarks", "rate")
+        list_serializer_class = TimedListSerializer
+
+
+class BulkUserBookRelationListSerializer(TimedListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > BULK_RELATIONS_LIMIT:
+            raise serializers.ValidationError(
+                {"non_field_errors": [f"Ensure there are no more than {BULK_RELATIONS_LIMIT} items."]}
+            )
+        if isinstance(data, list):
+            # One query for every book of the batch instead of one per item.
+            book_ids = {
+                str(item.get("book"))
+                for item in data
+                if isinstance(item, dict) and str(item.get("book")).isdigit()
+            }
+            self._context["books"] = Book.objects.in_bulk(map(int, book_ids))
+        return super().to_internal_value(data)
+
+
+class BulkUserBookRelationSerializer(UserBookRelationSerializer):
+    """Batch item, validated with PATCH semantics except that ``book`` is required."""
+
+    class Meta(UserBookRelationSerializer.Meta):
+        list_serializer_class = BulkUserBookRelationListSerializer
+
+    def validate(self, attrs):
+        if "book" not in attrs:
+            raise serializers.ValidationError(
+                {"book": [self.fields["book"].error_messages["required"]]}
+            )
+        return attrs
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from store import leaderboards
+from store.auth import invalidate_user
+from store.cache import invalidate_books, invalidate_search
+from store.logic import (
+    RELATION_STATE_FIELDS,
+    apply_deltas,
+    rebuild_counters,
+    relation_deltas,
+    relation_state,
+)
+from store.models import Book, UserBookRelation
+from store.search import SEARCH_FIELDS
+
+
+@receiver(post_save, sender=UserBookRelation)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    new = relation_state(instance)
+    if created:
+        deltas = relation_deltas(None, new)
+    elif hasattr(instance, "_loaded_values"):
+        old = {field: instance._loaded_values.get(field) for field in RELATION_STATE_FIELDS}
+        deltas = relation_deltas(old, new)
+    else:
+        # The previous state is unknown, fall back to a recount of the book.
+        deltas = {}
+        rebuild_counters(Book.objects.filter(pk=instance.book_id))
+    apply_deltas(deltas)
+    invalidate_books(set(deltas) | {instance.book_id}, using=kwargs.get("using"))
+    instance._loaded_values = new
+
+
+@receiver(post_delete, sender=UserBookRelation)
+def update_counters_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, "_loaded_values", None) or relation_state(instance)
+    apply_deltas(relation_deltas(old, None))
+    invalidate_books([old["book_id"]], using=kwargs.get("using"))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_responses(sender, instance, **kwargs):
+    invalidate_books([instance.pk], using=kwargs.get("using"))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_search_index(sender, instance, **kwargs):
+    loaded = getattr(instance, "_loaded_values", None)
+    values = {field: getattr(instance, field) for field in SEARCH_FIELDS}
+    changed = loaded is None or any(loaded.get(field) != value for field, value in values.items())
+    if kwargs["signal"] is post_delete or kwargs.get("created") or changed:
+        invalidate_search(using=kwargs.get("using"))
+    if loaded is not None:
+        loaded.update(values)
+
+
+@receiver(post_save, sender=Book)
+def add_to_leaderboards(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        leaderboards.book_created(instance)
+
+
+@receiver(post_delete, sender=Book)
+def remove_from_leaderboards(sender, instance, **kwargs):
+    leaderboards.book_deleted(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_cached_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        user_ids = [instance.pk] if action.startswith("post_") else []
+    elif action == "pre_clear":
+        # group.user_set.clear(), the users are unknown afterwards.
+        user_ids = list(instance.user_set.values_list("pk", flat=True))
+    else:
+        user_ids = pk_set if action in ("post_add", "post_remove") else []
+    for user_id in user_ids:
+        invalidate_user(user_id)
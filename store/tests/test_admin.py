@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from store.models import Book, UserBookRelation
+from store.pagination import EstimatedCountPaginator
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(self.admin)
+
+    def create_books(self, count):
+        users = [User.objects.create(username=f"reader_{User.objects.count()}") for _ in range(2)]
+        for i in range(count):
+            book = Book.objects.create(
+                name=f"Book {i}", price=10, discount=0, author="Author", owner=users[0]
+            )
+            for user in users:
+                UserBookRelation.objects.create(user=user, book=book, like=True, rate=4)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        return len(context.captured_queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        for model in ("book", "userbookrelation"):
+            url = reverse(f"admin:store_{model}_changelist")
+            with self.subTest(model=model):
+                Book.objects.all().delete()
+                self.create_books(2)
+                # Warms the user cache up.
+                self.client.get(url)
+                few = self.count_queries(url)
+                self.create_books(10)
+                self.assertEqual(few, self.count_queries(url))
+
+    def test_book_columns(self):
+        self.create_books(1)
+        response = self.client.get(reverse("admin:store_book_changelist"))
+        book = response.context["cl"].result_list[0]
+        self.assertEqual(2, book.likes_count)
+        self.assertEqual(4.0, book.rating)
+
+    def test_search(self):
+        Book.objects.create(name="Python crash course", price=10, discount=0, author="Eric Matthes")
+        Book.objects.create(name="Clean code", price=30, discount=0, author="Robert Martin")
+        response = self.client.get(reverse("admin:store_book_changelist"), {"q": "pyth"})
+        names = [book.name for book in response.context["cl"].result_list]
+        self.assertEqual(["Python crash course"], names)
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def setUp(self):
+        for i in range(3):
+            Book.objects.create(name=f"Book {i}", price=10, discount=0, author="Author")
+
+    def test_exact_count_without_estimate(self):
+        paginator = EstimatedCountPaginator(Book.objects.order_by("id"), 2)
+        self.assertIsNone(paginator.estimate_count())
+        self.assertEqual(3, paginator.count)
+        self.assertEqual(2, paginator.num_pages)
+
+    def test_estimate_above_threshold(self):
+        paginator = EstimatedCountPaginator(Book.objects.order_by("id"), 2)
+        with mock.patch.object(paginator, "estimate_count", return_value=50000):
+            self.assertEqual(50000, paginator.count)
+
+    def test_exact_count_below_threshold(self):
+        paginator = EstimatedCountPaginator(Book.objects.order_by("id"), 2)
+        with mock.patch.object(paginator, "estimate_count", return_value=10):
+            self.assertEqual(3, paginator.count)
@@ -1,15 +1,19 @@
 import json
+from unittest import mock
 
 from django.contrib.auth.models import User
+from django.db import connection
 from django.db.models import query
 from django.db.models.aggregates import Avg, Count
 from django.db.models.expressions import Case, When
 from django.http import response
 from django.test.testcases import SerializeMixin
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from store import logic
 from store.models import Book, UserBookRelation
 from store.serializer import BookSerializer
 from store.views import BookViewSet
@@ -46,7 +50,7 @@ class BookApiTest(APITestCase):
         serializer_data = BookSerializer(queryset, many=True).data
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
-        self.assertEqual(serializer_data, response.data)
+        self.assertEqual(serializer_data, response.data["results"])
         self.assertEqual(serializer_data[0]["rating"], "4.00")
         self.assertEqual(serializer_data[0]["annotated_likes"], 1)
 
@@ -112,7 +116,37 @@ class BookApiTest(APITestCase):
         serializer_data = BookSerializer(queryset, many=True).data
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
-        self.assertEqual(serializer_data, response.data)
+        self.assertEqual(serializer_data, response.data["results"])
+
+    def test_export(self):
+        url = reverse("book-export")
+        response = self.client.get(url, data={"ordering": "-price"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        serializer_data = BookSerializer(self.view.queryset.order_by("-price", "id"), many=True).data
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("application/x-ndjson", response["Content-Type"])
+        self.assertEqual(json.loads(json.dumps(serializer_data)), rows)
+
+    def test_default_renderer_is_json(self):
+        url = reverse("book-detail", args=(self.book1.id,))
+        response = self.client.get(url, HTTP_ACCEPT="*/*")
+
+        self.assertEqual("application/json", response["Content-Type"])
+        self.assertEqual(self.book1.id, json.loads(response.content)["id"])
+
+    def test_retrieve_rating_distribution(self):
+        response = self.client.get(reverse("book-detail", args=(self.book1.id,)))
+
+        self.assertEqual({"1": 0, "2": 0, "3": 0, "4": 1, "5": 0}, response.data["rating_distribution"])
+        self.assertEqual("3.09", response.data["rating_score"])
+
+    def test_ordering_by_rating_score(self):
+        response = self.client.get(reverse("book-list"), data={"ordering": "-rating_score"})
+
+        ids = [book["id"] for book in response.data["results"]]
+        # Ties are broken by id in the same direction.
+        self.assertEqual([self.book1.id, self.book3.id, self.book2.id], ids)
 
     def test_delete(self):
         url = reverse("book-detail", args=(self.book1.id,))
@@ -120,7 +154,7 @@ class BookApiTest(APITestCase):
         self.book1.refresh_from_db()
         response = self.client.delete(url)
 
-        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
         self.assertEqual(Book.objects.filter(pk=self.book1.pk).exists(), False)
 
 
@@ -175,3 +209,85 @@ class BooksRelationTest(APITestCase):
             url, data=json_data, content_type="application/json"
         )
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_bulk(self):
+        UserBookRelation.objects.create(user=self.user1, book=self.book2, like=True, rate=2)
+        url = reverse("userbookrelation-bulk")
+        data = [
+            {"book": self.book1.id, "like": True, "rate": 5},
+            {"book": self.book2.id, "like": False, "in_bookmarks": True},
+            {"book": self.book1.id, "in_bookmarks": True},
+        ]
+        self.client.force_login(self.user1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data=json.dumps(data), content_type="application/json")
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertLess(len(queries), 15)
+        self.assertEqual(
+            [
+                {"book": self.book1.id, "like": True, "in_bookmarks": True, "rate": 5, "created": True},
+                {"book": self.book2.id, "like": False, "in_bookmarks": True, "rate": 2, "created": False},
+                {"book": self.book1.id, "like": True, "in_bookmarks": True, "rate": 5, "created": True},
+            ],
+            response.data,
+        )
+        counters = Book.objects.order_by("id").values_list(
+            "likes_count", "bookmarks_count", "rating_sum", "rating_count"
+        )
+        self.assertEqual([(1, 1, 5, 1), (0, 1, 2, 1)], list(counters[:2]))
+
+    def test_bulk_invalid_items(self):
+        url = reverse("userbookrelation-bulk")
+        data = [
+            {"book": self.book1.id, "like": True},
+            {"book": 0, "like": True},
+            {"rate": 6},
+        ]
+        self.client.force_login(self.user1)
+        response = self.client.post(url, data=json.dumps(data), content_type="application/json")
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual({}, response.data[0])
+        self.assertIn("book", response.data[1])
+        self.assertIn("rate", response.data[2])
+        self.assertFalse(UserBookRelation.objects.filter(user=self.user1).exists())
+
+    def test_bulk_book_deleted_after_validation(self):
+        url = reverse("userbookrelation-bulk")
+        data = [{"book": self.book1.id, "like": True}, {"book": self.book2.id, "like": True}]
+        lock_relations = logic.lock_relations
+
+        def delete_and_lock(user_id, book_ids):
+            Book.objects.filter(pk=self.book2.id).delete()
+            return lock_relations(user_id, book_ids)
+
+        self.client.force_login(self.user1)
+        with mock.patch("store.logic.lock_relations", delete_and_lock):
+            response = self.client.post(url, data=json.dumps(data), content_type="application/json")
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual({}, response.data[0])
+        self.assertIn("book", response.data[1])
+        self.assertFalse(UserBookRelation.objects.filter(user=self.user1).exists())
+
+    def test_relation_of_missing_book(self):
+        url = reverse("userbookrelation-detail", args=(0,))
+        self.client.force_login(self.user1)
+        response = self.client.patch(
+            url, data=json.dumps({"like": True}), content_type="application/json"
+        )
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertFalse(UserBookRelation.objects.exists())
+
+    def test_repeated_patch_keeps_one_relation(self):
+        url = reverse("userbookrelation-detail", args=(self.book1.id,))
+        self.client.force_login(self.user1)
+        for data in ({"like": True}, {"rate": 4}, {"like": False}):
+            self.client.patch(url, data=json.dumps(data), content_type="application/json")
+
+        relation = UserBookRelation.objects.get(user=self.user1, book=self.book1)
+        self.assertEqual((False, 4), (relation.like, relation.rate))
+        self.book1.refresh_from_db()
+        self.assertEqual((0, 4, 1), (self.book1.likes_count, self.book1.rating_sum, self.book1.rating_count))
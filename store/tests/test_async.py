@@ -0,0 +1,66 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from store.models import Book, UserBookRelation
+
+
+@override_settings(STORE_RESPONSE_CACHE_TIMEOUT=0)
+class AsyncViewsTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+        self.book = Book.objects.create(
+            name="Test book 1", price=25, discount=5, author="Author 1", owner=self.user
+        )
+        Book.objects.create(name="Test book 2", price=55, discount=0, author="Author 2")
+
+    def request(self, method, path, **kwargs):
+        async def send():
+            return await getattr(self.async_client, method)(path, **kwargs)
+
+        return async_to_sync(send)()
+
+    def test_list(self):
+        response = self.request("get", reverse("async-book-list"))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            self.client.get(reverse("book-list")).json()["results"], response.json()["results"]
+        )
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+    def test_retrieve(self):
+        response = self.request("get", reverse("async-book-detail", args=(self.book.id,)))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("Test book 1", response.json()["name"])
+        missing = self.request("get", reverse("async-book-detail", args=(0,)))
+        self.assertEqual(404, missing.status_code)
+
+    @override_settings(STORE_ASYNC_THREADS=2)
+    def test_relation_update(self):
+        self.async_client.force_login(self.user)
+        response = self.request(
+            "patch",
+            reverse("async-userbookrelation-detail", args=(self.book.id,)),
+            data=json.dumps({"like": True}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(UserBookRelation.objects.get(user=self.user, book=self.book).like)
+        self.book.refresh_from_db()
+        self.assertEqual(1, self.book.likes_count)
+
+    def test_relation_update_requires_login(self):
+        response = self.request(
+            "patch",
+            reverse("async-userbookrelation-detail", args=(self.book.id,)),
+            data=json.dumps({"like": True}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(403, response.status_code)
@@ -0,0 +1,123 @@
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from store.auth import get_cached_user, make_token
+from store.models import Book
+from store.permisions import IsOwnerOrReadOnly
+
+
+def tables(context):
+    return " ".join(query["sql"] for query in context.captured_queries)
+
+
+class CachedSessionUserTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("reader", password="secret")
+        self.client.login(username="reader", password="secret")
+        self.url = reverse("me-likes")
+
+    def get(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        return response, tables(context)
+
+    def test_user_is_cached(self):
+        response, sql = self.get()
+        self.assertEqual(200, response.status_code)
+        self.assertIn('"auth_user"', sql)
+
+        response, sql = self.get()
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('"auth_user"', sql)
+
+    def test_save_invalidates(self):
+        self.get()
+        self.user.first_name = "Changed"
+        self.user.save()
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+        self.user.set_password("other")
+        self.user.save()
+        self.assertEqual(403, self.get()[0].status_code)
+
+    def test_group_change_invalidates(self):
+        self.get()
+        group = Group.objects.create(name="staff")
+        group.user_set.add(self.user)
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+        self.get()
+        group.user_set.clear()
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    @override_settings(STORE_USER_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.get()
+        self.assertIn('"auth_user"', self.get()[1])
+
+
+class SignedTokenTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("reader", password="secret")
+        self.url = reverse("me-likes")
+
+    def test_token_endpoint(self):
+        response = self.client.post(
+            reverse("store-token"), {"username": "reader", "password": "secret"}
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertIn("expires_in", response.data)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(200, self.client.get(self.url).status_code)
+        self.assertNotIn("django_session", tables(context))
+
+    def test_wrong_password(self):
+        response = self.client.post(
+            reverse("store-token"), {"username": "reader", "password": "wrong"}
+        )
+        self.assertEqual(400, response.status_code)
+
+    def test_invalid_tokens(self):
+        token = make_token(self.user)
+        for header in ("Bearer garbage", f"Bearer {token}x", "Bearer"):
+            self.client.credentials(HTTP_AUTHORIZATION=header)
+            self.assertEqual(403, self.client.get(self.url).status_code)
+
+    def test_password_change_revokes(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {make_token(self.user)}")
+        self.user.set_password("other")
+        self.user.save()
+        self.assertEqual(403, self.client.get(self.url).status_code)
+
+    @override_settings(STORE_AUTH_TOKEN_MAX_AGE=-1)
+    def test_expired(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {make_token(self.user)}")
+        self.assertEqual(403, self.client.get(self.url).status_code)
+
+    def test_inactive_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {make_token(self.user)}")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(403, self.client.get(self.url).status_code)
+
+
+class IsOwnerOrReadOnlyTest(TestCase):
+    def test_compares_owner_id(self):
+        owner = User.objects.create(username="owner")
+        other = User.objects.create(username="other")
+        Book.objects.create(name="Book", price=10, discount=0, author="Author", owner=owner)
+        book = Book.objects.get()
+        permission = IsOwnerOrReadOnly()
+        factory = APIRequestFactory()
+
+        for user, allowed in ((owner, True), (other, False)):
+            request = factory.patch("/")
+            request.user = user
+            with self.assertNumQueries(0):
+                self.assertEqual(allowed, permission.has_object_permission(request, None, book))
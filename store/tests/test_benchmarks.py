@@ -0,0 +1,89 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+
+from store.models import Book
+
+
+class BenchmarkCommandTest(TestCase):
+    def benchmark(self, suite, *args, books="30"):
+        stdout = StringIO()
+        call_command(
+            "benchmark", suite, "--books", books, "--users", "5", "--relations-per-book", "2",
+            *args, stdout=stdout,
+        )
+        return json.loads(stdout.getvalue())
+
+    def test_indexes(self):
+        report = self.benchmark("indexes", "--repeat", "2")["runs"][0]["results"]
+
+        self.assertIn("store_book_price_id_idx", report["indexes"])
+        self.assertIn("price_id_idx", report["after"]["filter_price"]["plan"])
+        self.assertNotIn("price_id_idx", report["before"]["filter_price"]["plan"])
+        self.assertEqual(2, report["before"]["list_by_id"]["latency"]["runs"])
+        self.assertFalse(Book.objects.exists())
+
+    def test_api(self):
+        report = self.benchmark("api", "--repeat", "2", books="20,40")
+
+        self.assertEqual([20, 40], [run["dataset"]["books"] for run in report["runs"]])
+        results = report["runs"][1]["results"]
+        for case in ("list", "retrieve", "search", "ordering", "relation_patch"):
+            self.assertIn(results[case]["status"], (200, 204))
+            self.assertIn("p99_ms", results[case]["latency"])
+        self.assertIn("p50_ms", results["list"]["serialization"])
+        self.assertLessEqual(results["list_cached"]["queries"], results["list"]["queries"])
+        self.assertFalse(Book.objects.exists())
+
+    def test_serializer(self):
+        report = self.benchmark("serializer", "--repeat", "2")["runs"][0]["results"]
+
+        self.assertEqual(30, report["rows"])
+        self.assertTrue(report["identical"])
+        self.assertGreater(report["row_serializer"]["rows_per_second"], 0)
+
+    def test_compression(self):
+        report = self.benchmark("compression", "--repeat", "2")["runs"][0]["results"]
+
+        self.assertEqual(30, report["rows"])
+        self.assertIn("gzip", report["encodings"])
+        self.assertLess(report["columnar"]["identity"]["bytes"], report["json"]["identity"]["bytes"])
+        self.assertLess(report["json"]["gzip"]["ratio"], 1)
+        self.assertIn("p50_ms", report["columnar"]["gzip"]["compress"])
+
+
+class ConcurrencyBenchmarkTest(TransactionTestCase):
+    def test_concurrency(self):
+        user = User.objects.create(username="test_username")
+        Book.objects.create(name="Test book 1", price=25, discount=5, author="Author 1", owner=user)
+        stdout = StringIO()
+        call_command(
+            "benchmark", "concurrency", "--concurrency", "4", "--workers", "2",
+            "--client-delay", "1", "--repeat", "2", stdout=stdout,
+        )
+        report = json.loads(stdout.getvalue())["runs"][0]["results"]
+
+        for server in ("wsgi", "asgi"):
+            self.assertEqual(8, report[server]["runs"])
+            self.assertEqual(0, report[server]["errors"])
+            self.assertGreater(report[server]["throughput_rps"], 0)
+
+    def test_pooling(self):
+        stdout = StringIO()
+        call_command(
+            "benchmark", "pooling", "--concurrency", "4", "--workers", "2",
+            "--connect-delay", "1", "--repeat", "3", stdout=stdout,
+        )
+        report = json.loads(stdout.getvalue())["runs"][0]["results"]
+
+        self.assertEqual(12, report["unpooled"]["runs"])
+        self.assertEqual(12, report["pooled"]["runs"])
+        self.assertEqual(12, report["pool"]["checkouts"])
+        self.assertLessEqual(report["pool"]["created"], 2)
+
+    def test_concurrency_requires_existing_data(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "concurrency", "--books", "10", stdout=StringIO())
@@ -0,0 +1,78 @@
+import json
+import tempfile
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store import cache
+from store.models import Book
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+        self.book = Book.objects.create(
+            name="Test book 1", price=25, discount=5, author="Author 1", owner=self.user
+        )
+        self.list_url = reverse("book-list")
+        self.detail_url = reverse("book-detail", args=(self.book.id,))
+
+    def test_list_hit(self):
+        first = self.client.get(self.list_url, data={"ordering": "price"})
+        before = cache.stats()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.list_url, data={"ordering": "price"})
+
+        # Only the conditional GET validators are read from the database.
+        self.assertEqual(1, len(queries))
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(before["hits"] + 1, cache.stats()["hits"])
+
+    def test_query_params_are_normalized(self):
+        self.client.get(self.list_url, data={"ordering": "price", "search": "Test"})
+        hits = cache.stats()["hits"]
+        self.client.get(f"{self.list_url}?search=Test&ordering=price")
+
+        self.assertEqual(hits + 1, cache.stats()["hits"])
+
+    def test_relation_update_invalidates(self):
+        self.client.get(self.detail_url)
+        self.client.get(self.list_url)
+        self.client.force_login(self.user)
+        url = reverse("userbookrelation-detail", args=(self.book.id,))
+        self.client.patch(url, data=json.dumps({"like": True}), content_type="application/json")
+
+        self.assertEqual(1, self.client.get(self.detail_url).data["annotated_likes"])
+        self.assertEqual(1, self.client.get(self.list_url).data["results"][0]["annotated_likes"])
+
+    def test_book_update_invalidates(self):
+        self.client.get(self.detail_url)
+        invalidations = cache.stats()["invalidations"]
+        Book.objects.get(pk=self.book.pk).save()
+
+        self.assertEqual(invalidations + 1, cache.stats()["invalidations"])
+        misses = cache.stats()["misses"]
+        self.client.get(self.detail_url)
+        self.assertEqual(misses + 1, cache.stats()["misses"])
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }
+            with override_settings(CACHES={"default": backend}):
+                self.client.get(self.detail_url)
+                hits = cache.stats()["hits"]
+                response = self.client.get(self.detail_url)
+                self.assertEqual(hits + 1, cache.stats()["hits"])
+                self.assertEqual(self.book.id, response.data["id"])
+
+                Book.objects.get(pk=self.book.pk).save()
+                misses = cache.stats()["misses"]
+                self.client.get(self.detail_url)
+                self.assertEqual(misses + 1, cache.stats()["misses"])
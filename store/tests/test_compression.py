@@ -0,0 +1,117 @@
+import gzip
+import json
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store.compression import negotiate, parse_accept_encoding
+from store.models import Book
+from store.renderers import ColumnarJSONRenderer
+
+
+class NegotiationTest(SimpleTestCase):
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            {"gzip": 1.0, "br": 0.5, "*": 0.0},
+            parse_accept_encoding("gzip, br;q=0.5, *;q=0, ;;"),
+        )
+
+    def test_negotiate(self):
+        preference = ["br", "zstd", "gzip"]
+        self.assertEqual("gzip", negotiate("gzip, deflate", ["gzip"]))
+        self.assertEqual("gzip", negotiate("*", ["gzip"]))
+        self.assertIsNone(negotiate("gzip;q=0", ["gzip"]))
+        self.assertIsNone(negotiate("identity", preference))
+        self.assertIsNone(negotiate("", preference))
+
+
+@override_settings(STORE_COMPRESSION_MIN_SIZE=200, STORE_COMPRESSION_ENCODINGS=["gzip"])
+class CompressionMiddlewareTest(APITestCase):
+    def setUp(self):
+        for i in range(20):
+            Book.objects.create(name=f"Test book {i}", price=10 + i, discount=0, author="Author")
+        self.url = reverse("book-list")
+
+    def test_compresses_json(self):
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(plain.content, gzip.decompress(response.content))
+        self.assertEqual(str(len(response.content)), response["Content-Length"])
+        self.assertEqual("W/" + plain["ETag"], response["ETag"])
+
+        not_modified = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(304, not_modified.status_code)
+
+    def test_skips_small_and_html_responses(self):
+        with override_settings(STORE_COMPRESSION_MIN_SIZE=100000):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_ACCEPT="text/html")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_compresses_streams(self):
+        response = self.client.get(
+            reverse("book-export"), {"format": "csv"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual("gzip", response["Content-Encoding"])
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(21, len(content.splitlines()))
+
+
+class ColumnarJSONTest(APITestCase):
+    def setUp(self):
+        for i in range(3):
+            Book.objects.create(name=f"Test book {i}", price=10 + i, discount=0, author="Author")
+        self.url = reverse("book-list")
+
+    def test_list(self):
+        plain = self.client.get(self.url, {"page_size": 2}).data
+        for params, headers in (
+            ({"format": "columnar"}, {}),
+            ({}, {"HTTP_ACCEPT": "application/vnd.store.columnar+json"}),
+        ):
+            response = self.client.get(self.url, dict(params, page_size=2), **headers)
+            self.assertEqual("application/vnd.store.columnar+json", response["Content-Type"])
+            data = json.loads(response.content)
+            self.assertEqual(["next", "previous", "fields", "rows"], list(data))
+            self.assertEqual(list(plain["results"][0]), data["fields"])
+            self.assertEqual([list(row.values()) for row in plain["results"]], data["rows"])
+
+    def test_render(self):
+        renderer = ColumnarJSONRenderer()
+        self.assertEqual(
+            {"fields": ["id", "name"], "rows": [[1, "a"], [2, None]]},
+            json.loads(renderer.render([{"id": 1, "name": "a"}, {"id": 2, "name": None}])),
+        )
+        self.assertEqual({"fields": ["id"], "rows": [[1]]}, json.loads(renderer.render([{"id": 1}])))
+        self.assertEqual({"fields": [], "rows": []}, json.loads(renderer.render([])))
+        self.assertEqual({"id": 1}, json.loads(renderer.render({"id": 1})))
+        self.assertEqual(
+            [{"id": 1}, {"id": 2, "name": "b"}],
+            json.loads(renderer.render([{"id": 1}, {"id": 2, "name": "b"}])),
+        )
+        self.assertEqual(["a", "b"], json.loads(renderer.render(["a", "b"])))
+
+    def test_error_payloads(self):
+        user = User.objects.create(username="test_username")
+        self.client.force_login(user)
+        missing = {"book": ['Invalid pk "0" - object does not exist.']}
+        for data, errors in (
+            ([{"book": Book.objects.first().id}, {"book": 0}], [{}, missing]),
+            ([{"book": 0}, {"book": 0}], [missing, missing]),
+        ):
+            response = self.client.post(
+                reverse("userbookrelation-bulk") + "?format=columnar",
+                data=json.dumps(data),
+                content_type="application/json",
+            )
+            self.assertEqual(400, response.status_code)
+            self.assertEqual(errors, json.loads(response.content))
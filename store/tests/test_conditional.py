@@ -0,0 +1,65 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.models import Book
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+        self.book = Book.objects.create(
+            name="Test book 1", price=25, discount=5, author="Author 1", owner=self.user
+        )
+        Book.objects.create(name="Test book 2", price=55, discount=10, author="Author 2")
+        self.list_url = reverse("book-list")
+        self.detail_url = reverse("book-detail", args=(self.book.id,))
+
+    def test_list_not_modified(self):
+        response = self.client.get(self.list_url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(1, len(queries))
+        self.assertNotIn("store_userbookrelation", queries[0]["sql"])
+
+    def test_detail_not_modified_since(self):
+        response = self.client.get(self.detail_url)
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_relation_change_modifies(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        list_etag = self.client.get(self.list_url)["ETag"]
+        self.client.force_login(self.user)
+        url = reverse("userbookrelation-detail", args=(self.book.id,))
+        self.client.patch(url, data=json.dumps({"rate": 5}), content_type="application/json")
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("5.00", response.data["rating"])
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_delete_modifies_list(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        Book.objects.filter(pk=self.book.pk).delete()
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_missing_book(self):
+        response = self.client.get(reverse("book-detail", args=(0,)))
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
@@ -0,0 +1,127 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store.importer import import_books, read_csv, read_jsonl
+from store.models import Book
+
+CSV = """name,price,discount,author
+Book 1,10.50,1,Author 1
+Book 2,not a price,0,Author 2
+Book 3,7,0,
+"""
+
+
+class ImportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+
+    def test_csv(self):
+        report = import_books(read_csv(StringIO(CSV)), owner=self.user, batch_size=2)
+
+        self.assertEqual((2, 1), (report["created"], report["failed"]))
+        self.assertEqual(3, report["errors"][0]["line"])
+        self.assertIn("price", report["errors"][0]["errors"])
+        names = Book.objects.order_by("name").values_list("name", flat=True)
+        self.assertEqual(["Book 1", "Book 3"], list(names))
+        self.assertEqual({self.user.pk}, set(Book.objects.values_list("owner", flat=True)))
+
+    def test_jsonl(self):
+        lines = [
+            json.dumps({"name": "Book 1", "price": "1.00", "discount": "0", "author": "A"}),
+            "{broken",
+            "",
+            json.dumps(["not", "an", "object"]),
+            json.dumps({"name": "Book 2", "price": 2, "discount": 0}),
+        ]
+        report = import_books(read_jsonl(StringIO("\n".join(lines))))
+
+        self.assertEqual((2, 2), (report["created"], report["failed"]))
+        self.assertEqual([2, 4], [error["line"] for error in report["errors"]])
+
+    def test_database_errors_are_isolated(self):
+        # Both rows pass validation, the database rejects the second one.
+        rows = [
+            (2, {"name": "Book 1", "price": "1.00", "discount": "0"}, None),
+            (3, {"name": "Book 2", "price": "2.00", "discount": "0"}, None),
+        ]
+        bulk_create = Book.objects.bulk_create
+
+        def rejecting_bulk_create(books, *args, **kwargs):
+            if any(book.name == "Book 2" for book in books):
+                raise IntegrityError("rejected")
+            return bulk_create(books, *args, **kwargs)
+
+        with mock.patch.object(Book.objects, "bulk_create", rejecting_bulk_create):
+            report = import_books(iter(rows))
+
+        self.assertEqual((1, 1), (report["created"], report["failed"]))
+        self.assertEqual(3, report["errors"][0]["line"])
+
+    def test_endpoint(self):
+        url = reverse("book-import-books")
+        self.assertEqual(403, self.client.post(url, data=CSV, content_type="text/csv").status_code)
+
+        self.client.force_login(self.user)
+        response = self.client.post(url, data=CSV, content_type="text/csv")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.data["created"])
+
+        response = self.client.post(url, data="{}", content_type="application/json")
+        self.assertEqual(415, response.status_code)
+
+    def test_csv_errors_do_not_stop_the_import(self):
+        lines = CSV.splitlines(keepends=True)
+        oversized = f"Book 4,{'1' * 200000},0,A\n"
+        report = import_books(read_csv(StringIO("".join(lines[:2] + [oversized] + lines[2:]))))
+
+        self.assertEqual((2, 2), (report["created"], report["failed"]))
+        self.assertEqual([3, 4], [error["line"] for error in report["errors"]])
+        self.assertIn("field larger than field limit", str(report["errors"][0]["errors"]))
+
+    def test_replacement_character_is_valid(self):
+        self.client.force_login(self.user)
+        data = CSV.replace("Book 3", "Book \ufffd").encode()
+        response = self.client.post(reverse("book-import-books"), data=data, content_type="text/csv")
+
+        self.assertEqual(2, response.data["created"])
+        self.assertTrue(Book.objects.filter(name="Book \ufffd").exists())
+
+    def test_invalid_utf8(self):
+        self.client.force_login(self.user)
+        data = CSV.encode().replace(b"Book 3", b"Book \xff3")
+        response = self.client.post(reverse("book-import-books"), data=data, content_type="text/csv")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual((1, 2), (response.data["created"], response.data["failed"]))
+        self.assertEqual(
+            {"line": 4, "errors": {"non_field_errors": ["Invalid UTF-8."]}}, response.data["errors"][1]
+        )
+
+    def test_commands_round_trip(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(CSV)
+        stdout = StringIO()
+        call_command("import_books", file.name, "--owner", "test_username", stdout=stdout)
+        self.assertEqual(2, json.loads(stdout.getvalue())["created"])
+
+        stdout = StringIO()
+        call_command("export_books", "--format", "csv", stdout=stdout)
+        exported = list(read_csv(StringIO(stdout.getvalue())))
+        self.assertEqual(["Book 1", "Book 3"], [row["name"] for _, row, _ in exported])
+        self.assertEqual("9.50", exported[0][1]["discount_price"])
+
+    def test_csv_export_endpoint(self):
+        Book.objects.create(name="Book, with comma", price=5, discount=0, author="A")
+        response = self.client.get(reverse("book-export"), data={"format": "csv"})
+
+        self.assertEqual("text/csv; charset=utf-8", response["Content-Type"])
+        rows = list(read_csv(StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual("Book, with comma", rows[0][1]["name"])
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store import instrumentation
+from store.instrumentation import RequestMetrics, query_shape
+from store.models import Book
+
+
+@override_settings(STORE_RESPONSE_CACHE_TIMEOUT=0)
+class InstrumentationMiddlewareTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+        Book.objects.create(name="Test book 1", price=25, discount=5, author="Author 1", owner=self.user)
+
+    def test_server_timing(self):
+        response = self.client.get(reverse("book-list"))
+
+        timing = response["Server-Timing"]
+        self.assertIn('desc="2 queries"', timing)
+        for name in ("db", "serialize", "render", "total"):
+            self.assertIn(f"{name};dur=", timing)
+
+    @override_settings(STORE_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get(reverse("book-list"))
+
+        self.assertNotIn("Server-Timing", response)
+
+    def test_stats(self):
+        requests = instrumentation.stats().get("book-list", {}).get("requests", 0)
+        self.client.get(reverse("book-list"))
+
+        stats = instrumentation.stats()["book-list"]
+        self.assertEqual(requests + 1, stats["requests"])
+        self.assertIn("avg_queries", stats)
+        self.assertIn("avg_serialize_ms", stats)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.client.force_login(self.user)
+        self.assertEqual(403, self.client.get(reverse("store-stats")).status_code)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse("store-stats"))
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn("book-list", response.data["views"])
+        self.assertIn("hits", response.data["cache"])
+        self.assertIn("db_pools", response.data)
+
+
+class RequestMetricsTest(SimpleTestCase):
+    def test_query_shape(self):
+        self.assertEqual(
+            query_shape('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            query_shape('SELECT 1 FROM "t" WHERE "id" IN (%s, %s)'),
+        )
+
+    def test_repeated_queries(self):
+        metrics = RequestMetrics()
+        execute = lambda sql, params, many, context: None
+        for i in range(5):
+            metrics(execute, 'SELECT * FROM "auth_user" WHERE "id" = %s', [i], False, {})
+        metrics(execute, 'SELECT * FROM "store_book"', [], False, {})
+
+        self.assertEqual(6, metrics.queries)
+        self.assertEqual(
+            {'SELECT * FROM "auth_user" WHERE "id" = %s': 5}, metrics.repeated_queries(threshold=5)
+        )
+        self.assertEqual({}, metrics.repeated_queries(threshold=6))
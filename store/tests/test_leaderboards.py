@@ -0,0 +1,95 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store import leaderboards
+from store.leaderboards import Leaderboard
+from store.logic import rebuild_counters
+from store.models import Book, UserBookRelation
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f"user{i}") for i in range(4)]
+        self.books = [
+            Book.objects.create(name=f"Book {i}", price=10, discount=0, likes_count=i) for i in range(6)
+        ]
+        self.board = Leaderboard("likes_count", size=2)
+        self.board.rebuild()
+
+    def ids(self, *indexes):
+        return [self.books[i].pk for i in indexes]
+
+    def test_rebuild(self):
+        self.assertEqual(self.ids(5, 4), self.board.top())
+        self.assertEqual(self.ids(5, 4, 3, 2), [key[1] for key in self.board.keys])
+
+    def test_untracked_book_rises(self):
+        self.board.update(self.books[0].pk, 10)
+
+        self.assertEqual(self.ids(0, 5), self.board.top())
+        self.assertEqual(4, len(self.board.keys))
+
+    def test_tracked_book_falls_below_floor(self):
+        self.board.update(self.books[5].pk, 0)
+        self.assertEqual(self.ids(4, 3), self.board.top())
+        self.board.update(self.books[4].pk, 0)
+        self.board.update(self.books[3].pk, 0)
+
+        # Only one known book is left, the next read rebuilds.
+        self.assertIsNone(self.board.built_at)
+        Book.objects.filter(pk__in=self.ids(5, 4, 3)).update(likes_count=0)
+        self.assertEqual(self.ids(2, 1), self.board.top())
+
+    def test_ties_by_id(self):
+        self.board.update(self.books[3].pk, 5)
+
+        self.assertEqual(self.ids(3, 5), self.board.top())
+
+
+@override_settings(STORE_LEADERBOARD_SIZE=2)
+class LeaderboardApiTest(APITestCase):
+    def setUp(self):
+        leaderboards.reset()
+        self.addCleanup(leaderboards.reset)
+        self.user = User.objects.create(username="test_username")
+        self.book1 = Book.objects.create(name="Test book 1", price=25, discount=5, author="Author 1")
+        self.book2 = Book.objects.create(name="Test book 2", price=55, discount=0, author="Author 2")
+        self.book3 = Book.objects.create(name="Test book 3", price=5, discount=0, author="Author 3")
+        UserBookRelation.objects.create(user=self.user, book=self.book2, like=True)
+
+    def get_ids(self, metric):
+        response = self.client.get(reverse("book-leaderboard", args=(metric,)))
+        self.assertEqual(200, response.status_code)
+        return [book["id"] for book in response.data["results"]]
+
+    def test_liked(self):
+        self.assertEqual([self.book2.id, self.book1.id], self.get_ids("liked"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserBookRelation.objects.create(user=self.user, book=self.book3, like=True, rate=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserBookRelation.objects.filter(book=self.book2).update(like=False)
+            rebuild_counters()
+        self.assertEqual([self.book3.id, self.book1.id], self.get_ids("liked"))
+        self.assertEqual([self.book3.id, self.book1.id], self.get_ids("rated"))
+
+    def test_incremental_update(self):
+        self.get_ids("liked")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserBookRelation.objects.create(user=self.user, book=self.book3, like=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            other = User.objects.create(username="other")
+            UserBookRelation.objects.create(user=other, book=self.book3, like=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            book4 = Book.objects.create(name="Test book 4", price=5, discount=0, likes_count=9)
+
+        with self.assertNumQueries(1):
+            self.assertEqual([book4.id, self.book3.id], self.get_ids("liked"))
+
+    def test_unknown_metric(self):
+        response = self.client.get(reverse("book-leaderboard", args=("unknown",)))
+
+        self.assertEqual(404, response.status_code)
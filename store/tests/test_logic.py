@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+
+from store.models import Book, UserBookRelation
+
+
+class BookCountersTestCase(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(username="user1")
+        self.user2 = User.objects.create(username="user2")
+        self.book = Book.objects.create(name="Test book1", price=25, discount=10)
+
+    def assertCounters(self, likes, bookmarks, rating_sum, rating_count):
+        self.book.refresh_from_db()
+        self.assertEqual(
+            (likes, bookmarks, rating_sum, rating_count),
+            (
+                self.book.likes_count,
+                self.book.bookmarks_count,
+                self.book.rating_sum,
+                self.book.rating_count,
+            ),
+        )
+
+    def test_create(self):
+        UserBookRelation.objects.create(user=self.user1, book=self.book, like=True, rate=4)
+        UserBookRelation.objects.create(user=self.user2, book=self.book, in_bookmarks=True, rate=3)
+
+        self.assertCounters(1, 1, 7, 2)
+
+    def test_update(self):
+        relation = UserBookRelation.objects.create(user=self.user1, book=self.book, like=True)
+        relation = UserBookRelation.objects.get(pk=relation.pk)
+        relation.like = False
+        relation.in_bookmarks = True
+        relation.rate = 5
+        relation.save()
+
+        self.assertCounters(0, 1, 5, 1)
+
+    def test_delete(self):
+        UserBookRelation.objects.create(user=self.user1, book=self.book, like=True, rate=2)
+        UserBookRelation.objects.create(user=self.user2, book=self.book, like=True, rate=4)
+        UserBookRelation.objects.filter(user=self.user1).delete()
+
+        self.assertCounters(1, 0, 4, 1)
+
+    def test_stale_book_save_keeps_counters(self):
+        UserBookRelation.objects.create(user=self.user1, book=self.book, like=True, rate=4)
+        self.book.name = "Renamed"
+        self.book.save()
+
+        self.assertCounters(1, 0, 4, 1)
+
+    def test_rebuild_command(self):
+        UserBookRelation.objects.create(user=self.user1, book=self.book, like=True, rate=4)
+        Book.objects.update(likes_count=10, rating_sum=0, rating_count=0)
+        call_command("rebuild_book_counters", stdout=StringIO())
+
+        self.assertCounters(1, 0, 4, 1)
+
+    def assertRating(self, distribution, score):
+        self.book.refresh_from_db()
+        self.assertEqual(distribution, [getattr(self.book, field) for field in Book.RATING_FIELDS])
+        self.assertAlmostEqual(score, self.book.rating_score)
+
+    @override_settings(STORE_RATING_PRIOR_MEAN=3.0, STORE_RATING_PRIOR_WEIGHT=10)
+    def test_rating_histogram(self):
+        self.assertRating([0, 0, 0, 0, 0], 3.0)
+        relation = UserBookRelation.objects.create(user=self.user1, book=self.book, rate=5)
+        UserBookRelation.objects.create(user=self.user2, book=self.book, rate=4)
+        self.assertRating([0, 0, 0, 1, 1], 39 / 12)
+
+        relation.rate = 1
+        relation.save()
+        self.assertRating([1, 0, 0, 1, 0], 35 / 12)
+
+        relation.delete()
+        self.assertRating([0, 0, 0, 1, 0], 34 / 11)
+
+        Book.objects.update(rating_4_count=0, rating_score=0)
+        call_command("rebuild_book_counters", stdout=StringIO())
+        self.assertRating([0, 0, 0, 1, 0], 34 / 11)
+
+    def test_bayesian_score_ordering(self):
+        single = Book.objects.create(name="Single vote", price=25, discount=10)
+        UserBookRelation.objects.create(user=self.user1, book=single, rate=5)
+        for user in [self.user1, self.user2] + [User.objects.create(username=f"u{i}") for i in range(30)]:
+            UserBookRelation.objects.create(user=user, book=self.book, rate=4)
+
+        ordered = Book.objects.order_by("-rating_score").values_list("pk", flat=True)
+        self.assertEqual([self.book.pk, single.pk], list(ordered))
+
+    def test_unique_relation(self):
+        UserBookRelation.objects.create(user=self.user1, book=self.book)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserBookRelation.objects.create(user=self.user1, book=self.book)
@@ -0,0 +1,73 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.models import Book
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        prices = [30, 10, 20, 10, 30, 20, 10]
+        self.books = [
+            Book.objects.create(name=f"Book {i}", price=price, discount=0, author=f"Author {i % 3}")
+            for i, price in enumerate(prices)
+        ]
+        self.url = reverse("book-list")
+
+    def collect(self, params, key="next"):
+        url, ids = self.url, []
+        response = self.client.get(url, data=params)
+        while True:
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            ids.extend(book["id"] for book in response.data["results"])
+            url = response.data[key]
+            if url is None:
+                return ids, response
+            response = self.client.get(url)
+
+    def test_pages_by_id(self):
+        ids, _ = self.collect({"page_size": 3})
+
+        self.assertEqual([book.id for book in self.books], ids)
+
+    def test_pages_by_price_with_ties(self):
+        ids, _ = self.collect({"page_size": 2, "ordering": "-price"})
+
+        expected = sorted(self.books, key=lambda book: (-book.price, -book.id))
+        self.assertEqual([book.id for book in expected], ids)
+
+    def test_previous_pages(self):
+        ids, last_page = self.collect({"page_size": 2, "ordering": "author"})
+        pages = [[book["id"] for book in last_page.data["results"]]]
+        response = last_page
+        while response.data["previous"]:
+            response = self.client.get(response.data["previous"])
+            pages.insert(0, [book["id"] for book in response.data["results"]])
+
+        self.assertEqual(ids, sum(pages, []))
+        self.assertEqual([2, 2, 2, 1], [len(page) for page in pages])
+
+    def test_page_query_is_seek(self):
+        response = self.client.get(self.url, data={"page_size": 2, "ordering": "price"})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data["next"])
+
+        page_query = queries[-1]["sql"]
+        self.assertIn("LIMIT", page_query)
+        self.assertNotIn("OFFSET", page_query)
+
+    def test_tampered_cursor(self):
+        response = self.client.get(self.url, data={"page_size": 2})
+        token = response.data["next"].split("cursor=")[1]
+
+        response = self.client.get(self.url, data={"cursor": token[:-2] + "xx"})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_cursor_bound_to_ordering(self):
+        response = self.client.get(self.url, data={"page_size": 2, "ordering": "price"})
+        token = response.data["next"].split("cursor=")[1]
+
+        response = self.client.get(self.url, data={"cursor": token, "ordering": "author"})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
@@ -0,0 +1,151 @@
+import threading
+from unittest import mock
+
+from django.db import OperationalError
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.test import SimpleTestCase
+from psycopg2 import extensions
+
+from store.backends import pool
+from store.backends.pool import ConnectionPool, PoolTimeout
+from store.backends.postgresql.base import DatabaseWrapper
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+        self.isolation_level = None
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def make_pool(self, **options):
+        self.opened = []
+
+        def connect():
+            self.opened.append(FakeConnection())
+            return self.opened[-1]
+
+        return ConnectionPool(connect, **options)
+
+    def test_reuses_released_connections(self):
+        connections = self.make_pool(max_size=2)
+        first = connections.acquire()
+        connections.release(first)
+        self.assertIs(first, connections.acquire())
+        self.assertEqual(1, len(self.opened))
+        stats = connections.stats()
+        self.assertEqual(2, stats["checkouts"])
+        self.assertEqual(1, stats["created"])
+        self.assertEqual(1, stats["in_use"])
+
+    def test_times_out_when_exhausted(self):
+        connections = self.make_pool(max_size=1, timeout=0.01)
+        connections.acquire()
+        with self.assertRaises(PoolTimeout):
+            connections.acquire()
+        stats = connections.stats()
+        self.assertEqual(1, stats["waits"])
+        self.assertEqual(1, stats["timeouts"])
+
+    def test_waiter_gets_released_connection(self):
+        connections = self.make_pool(max_size=1, timeout=5)
+        first = connections.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(connections.acquire()))
+        waiter.start()
+        threading.Timer(0.05, connections.release, (first,)).start()
+        waiter.join(5)
+        self.assertEqual([first], acquired)
+        self.assertEqual(1, connections.stats()["waits"])
+
+    def test_health_check(self):
+        healthy = [False]
+        connections = self.make_pool(check_interval=0, check=lambda connection: healthy[0])
+        first = connections.acquire()
+        connections.release(first)
+        second = connections.acquire()
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(1, connections.stats()["discarded"])
+
+    def test_max_lifetime(self):
+        connections = self.make_pool(max_lifetime=0)
+        first = connections.acquire()
+        connections.release(first)
+        self.assertTrue(first.closed)
+        self.assertEqual(0, connections.stats()["size"])
+
+    def test_failed_connect_frees_the_slot(self):
+        connections = ConnectionPool(mock.Mock(side_effect=OSError), max_size=1, timeout=0.01)
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                connections.acquire()
+        self.assertEqual(0, connections.stats()["timeouts"])
+
+
+class PooledDatabaseWrapperTest(SimpleTestCase):
+    settings_dict = {
+        "ENGINE": "store.backends.postgresql",
+        "NAME": "books",
+        "USER": "",
+        "PASSWORD": "",
+        "HOST": "localhost",
+        "PORT": "",
+        "OPTIONS": {},
+        "AUTOCOMMIT": True,
+        "CONN_MAX_AGE": 0,
+        "TIME_ZONE": None,
+        "POOL": {"MAX_SIZE": 1, "TIMEOUT": 0.01},
+    }
+
+    def setUp(self):
+        pool.reset()
+        self.addCleanup(pool.reset)
+        patcher = mock.patch.object(
+            PostgreSQLDatabaseWrapper, "get_new_connection", side_effect=lambda params: FakeConnection()
+        )
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def checkout(self):
+        wrapper = DatabaseWrapper(dict(self.settings_dict), alias="pooled")
+        wrapper.connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        return wrapper
+
+    def test_close_returns_the_connection(self):
+        wrapper = self.checkout()
+        connection = wrapper.connection
+        connection.status = extensions.TRANSACTION_STATUS_INTRANS
+        wrapper._close()
+        self.assertFalse(connection.closed)
+        self.assertEqual(1, connection.rollbacks)
+        self.assertIs(connection, self.checkout().connection)
+        self.assertEqual(1, self.connect.call_count)
+        self.assertEqual(2, pool.stats()["pooled"]["checkouts"])
+
+    def test_broken_connection_is_discarded(self):
+        wrapper = self.checkout()
+        connection = wrapper.connection
+        connection.closed = 2
+        wrapper._close()
+        self.assertIsNot(connection, self.checkout().connection)
+        self.assertEqual(1, pool.stats()["pooled"]["discarded"])
+
+    def test_exhausted_pool_raises_operational_error(self):
+        self.checkout()
+        wrapper = DatabaseWrapper(dict(self.settings_dict), alias="pooled")
+        with self.assertRaises(OperationalError):
+            with wrapper.wrap_database_errors:
+                wrapper.get_new_connection(wrapper.get_connection_params())
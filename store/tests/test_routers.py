@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from store.cache import CATALOG_VERSION_KEY, CachedResponseMixin, get_cache
+from store.models import Book, UserBookRelation
+from store.routers import (
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    check_shared_cache,
+    read_from_replica,
+    sticky_key,
+)
+
+
+@override_settings(STORE_READ_REPLICAS=["replica"], STORE_REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = SimpleNamespace(pk=7, is_authenticated=True)
+        cache.delete(sticky_key(self.user.pk))
+        self.addCleanup(cache.delete, sticky_key(self.user.pk))
+
+    def serve(self, method, view):
+        """Run ``view`` through the middleware, return what it returned."""
+        request = getattr(self.factory, method)("/store/book/")
+        request.user = self.user
+        result = {}
+
+        def get_response(request):
+            result.update(view())
+            return None
+
+        ReplicaRoutingMiddleware(get_response)(request)
+        return result
+
+    def reads(self):
+        return {
+            "book": Book.objects.all().db,
+            "relation": UserBookRelation.objects.all().db,
+            "user": User.objects.all().db,
+        }
+
+    def test_safe_reads_go_to_a_replica(self):
+        self.assertEqual(
+            {"book": "replica", "relation": "replica", "user": "default"},
+            self.serve("get", self.reads),
+        )
+
+    def test_unsafe_requests_use_the_primary(self):
+        self.assertEqual("default", self.serve("patch", self.reads)["book"])
+
+    def test_outside_requests_use_the_primary(self):
+        self.assertEqual("default", Book.objects.all().db)
+
+    def test_primary_is_sticky_after_a_write(self):
+        def write():
+            ReplicaRouter().db_for_write(UserBookRelation)
+            return self.reads()
+
+        self.assertEqual("default", self.serve("post", write)["relation"])
+        self.assertEqual("default", self.serve("get", self.reads)["book"])
+
+        self.user = SimpleNamespace(pk=8, is_authenticated=True)
+        self.assertEqual("replica", self.serve("get", self.reads)["book"])
+
+    def test_read_from_replica(self):
+        def reads():
+            Book.objects.all().db
+            return {"replica": read_from_replica()}
+
+        self.assertEqual({"replica": True}, self.serve("get", reads))
+        self.assertEqual({"replica": False}, self.serve("post", reads))
+        self.assertFalse(read_from_replica())
+
+    def test_replica_reads_are_not_cached(self):
+        view = CachedResponseMixin()
+        view.basename, view.action = "book", "list"
+        get_cache().clear()
+
+        def cached_list():
+            request = Request(self.factory.get("/store/book/"))
+            response = view.cached_response(
+                CATALOG_VERSION_KEY, lambda request: Response({"db": Book.objects.all().db}), request
+            )
+            return response.data
+
+        self.assertEqual({"db": "replica"}, self.serve("get", cached_list))
+        self.assertEqual({"db": "replica"}, self.serve("get", cached_list))
+
+        with override_settings(STORE_READ_REPLICAS=[]):
+            self.assertEqual({"db": "default"}, self.serve("get", cached_list))
+        self.assertEqual({"db": "default"}, self.serve("get", cached_list))
+
+    @override_settings(STORE_READ_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual("default", self.serve("get", self.reads)["book"])
+
+    def test_shared_cache_check(self):
+        self.assertEqual(["store.W001"], [message.id for message in check_shared_cache(None)])
+        with override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache"}}
+        ):
+            self.assertEqual([], check_shared_cache(None))
+        with override_settings(STORE_READ_REPLICAS=[]):
+            self.assertEqual([], check_shared_cache(None))
+
+    def test_allow_migrate(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate("replica", "store"))
+        self.assertIsNone(router.allow_migrate("default", "store"))
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store import search
+from store.models import Book, UserBookRelation
+from store.search import InvertedIndex
+
+
+class InvertedIndexTest(SimpleTestCase):
+    def test_search(self):
+        index = InvertedIndex(
+            [
+                (1, "Learning Python", "Mark Lutz"),
+                (2, "Fluent Python", "Luciano Ramalho"),
+                (3, "Python Tricks", "Dan Bader"),
+                (4, "Dive into Go", "Luc Python"),
+            ]
+        )
+
+        self.assertEqual({1, 2, 3, 4}, set(index.search(["pyth"])))
+        self.assertEqual({2, 4}, set(index.search(["python", "luc"])))
+        self.assertEqual({}, index.search(["ython"]))
+        scores = index.search(["python"])
+        self.assertGreater(scores[1], scores[4])
+
+
+class BookSearchFilterTest(APITestCase):
+    def setUp(self):
+        self.url = reverse("book-list")
+        self.book1 = Book.objects.create(
+            name="Python crash course", price=10, discount=0, author="Eric Matthes"
+        )
+        self.book2 = Book.objects.create(
+            name="Two scoops", price=20, discount=0, author="Audrey Python"
+        )
+        self.book3 = Book.objects.create(
+            name="Clean code", price=30, discount=0, author="Robert Martin"
+        )
+
+    def search(self, **params):
+        response = self.client.get(self.url, data=params)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [book["id"] for book in response.data["results"]]
+
+    def test_search(self):
+        self.assertEqual([self.book1.id, self.book2.id], self.search(search="python"))
+        self.assertEqual([self.book3.id], self.search(search="cle mart"))
+
+    def test_order_by_relevance(self):
+        self.assertEqual(
+            [self.book1.id, self.book2.id], self.search(search="python", ordering="-search_rank")
+        )
+        self.assertEqual(
+            [self.book2.id, self.book1.id], self.search(search="python", ordering="search_rank")
+        )
+
+    def test_index_follows_catalog_changes(self):
+        self.search(search="python")
+        self.book3.name = "Python clean code"
+        self.book3.save()
+
+        self.assertEqual(
+            [self.book1.id, self.book2.id, self.book3.id], self.search(search="python")
+        )
+
+    def test_index_ignores_relation_changes(self):
+        self.search(search="python")
+        index = search.get_inverted_index(Book, "default")
+        user = User.objects.create(username="test_username")
+        UserBookRelation.objects.create(user=user, book=self.book1, like=True, rate=5)
+        book = Book.objects.get(pk=self.book1.pk)
+        book.price = 15
+        book.save()
+
+        self.assertIs(index, search.get_inverted_index(Book, "default"))
+
+    @override_settings(STORE_SEARCH_MAX_MATCHES=1)
+    def test_max_matches(self):
+        self.assertEqual([self.book1.id], self.search(search="python"))
+
+    def test_search_with_filter_and_pagination(self):
+        first_page = self.client.get(self.url, data={"search": "python", "page_size": 1})
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual([self.book2.id], [book["id"] for book in second_page.data["results"]])
+        self.assertEqual([self.book2.id], self.search(search="python", price=20))
@@ -1,8 +1,11 @@
 from django.db.models.aggregates import Avg, Count
 from django.db.models.expressions import Case, When
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
 
 from store.models import Book, UserBookRelation
+from store.renderers import FastJSONRenderer
+from store.rows import RowSerializer
 from store.serializer import BookSerializer
 from django.contrib.auth.models import User
 
@@ -45,6 +48,7 @@ class BookSerializerTestCase(TestCase):
                 "rating": "4.33",
                 "annotated_in_bookmarks": 2,
                 "discount_price": "15.00",
+                "rating_score": "3.31",
             },
             {
                 "id": book2.id,
@@ -55,7 +59,24 @@ class BookSerializerTestCase(TestCase):
                 "rating": "2.50",
                 "annotated_in_bookmarks": 1,
                 "discount_price": "50.00",
+                "rating_score": "2.92",
             },
         ]
 
         self.assertEqual(excepted_data, data)
+
+
+class RowSerializerTestCase(TestCase):
+    def test_matches_book_serializer(self):
+        user = User.objects.create(username="user1")
+        Book.objects.create(name="Test book1", price="25.10", discount=10, rating_sum=7, rating_count=3)
+        Book.objects.create(name="Тест book2", price="99999.99", discount="0.05", likes_count=2)
+        Book.objects.create(name="Test book3", price=1, discount=0, rating_sum=9, rating_count=2, owner=user)
+
+        queryset = BookViewSet.queryset.all()
+        row_serializer = RowSerializer(BookSerializer)
+        expected = FastJSONRenderer().render(BookSerializer(queryset, many=True).data)
+        data = row_serializer.to_representation(row_serializer.rows(queryset))
+
+        self.assertEqual(expected, FastJSONRenderer().render(data))
+        self.assertEqual(expected, JSONRenderer().render(data))
@@ -0,0 +1,117 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store.models import Book, UserBookRelation
+
+
+class ShelfApiTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+        self.other = User.objects.create(username="other_username")
+        self.books = [
+            Book.objects.create(name=f"Test book {i}", price=10 + i, discount=0, author="Author")
+            for i in range(4)
+        ]
+        self.books[3].owner = self.user
+        self.books[3].save()
+        UserBookRelation.objects.create(user=self.user, book=self.books[0], like=True)
+        UserBookRelation.objects.create(user=self.user, book=self.books[1], in_bookmarks=True, rate=4)
+        UserBookRelation.objects.create(user=self.other, book=self.books[2], like=True, in_bookmarks=True)
+        self.client.force_authenticate(self.user)
+
+    def get(self, shelf, **params):
+        response = self.client.get(reverse(f"me-{shelf}"), data=params)
+        self.assertEqual(200, response.status_code)
+        return response.data
+
+    def test_shelves(self):
+        shelves = {shelf: self.get(shelf)["results"] for shelf in ("likes", "bookmarks", "rated", "owned")}
+
+        self.assertEqual([self.books[0].id], [book["id"] for book in shelves["likes"]])
+        self.assertEqual([self.books[1].id], [book["id"] for book in shelves["bookmarks"]])
+        self.assertEqual([self.books[1].id], [book["id"] for book in shelves["rated"]])
+        self.assertEqual([self.books[3].id], [book["id"] for book in shelves["owned"]])
+
+    def test_relation_state(self):
+        book = self.get("bookmarks")["results"][0]
+        self.assertEqual(
+            (False, True, 4), (book["user_like"], book["user_in_bookmarks"], book["user_rate"])
+        )
+        self.assertEqual("Test book 1", book["name"])
+
+        owned = self.get("owned")["results"][0]
+        self.assertEqual(
+            (None, None, None), (owned["user_like"], owned["user_in_bookmarks"], owned["user_rate"])
+        )
+
+    def test_constant_queries_per_page(self):
+        for book in Book.objects.all():
+            UserBookRelation.objects.update_or_create(user=self.user, book=book, defaults={"like": True})
+        extra = [Book(name=f"Extra {i}", price=1, discount=0, author="Author") for i in range(20)]
+        Book.objects.bulk_create(extra)
+        UserBookRelation.objects.bulk_create(
+            UserBookRelation(user=self.user, book=book, like=True)
+            for book in Book.objects.filter(name__startswith="Extra")
+        )
+
+        with self.assertNumQueries(1):
+            page = self.get("likes", page_size=2)
+        cursor = parse_qs(urlparse(page["next"]).query)["cursor"][0]
+        with self.assertNumQueries(1):
+            page = self.get("likes", page_size=20, cursor=cursor)
+        self.assertEqual(20, len(page["results"]))
+
+    def test_requires_login(self):
+        self.client.force_authenticate(None)
+
+        self.assertEqual(403, self.client.get(reverse("me-likes")).status_code)
+
+
+class BookListRelationStateTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="test_username")
+        self.other = User.objects.create(username="other_username")
+        self.books = [
+            Book.objects.create(name=f"Test book {i}", price=10 + i, discount=0, author="Author")
+            for i in range(30)
+        ]
+        UserBookRelation.objects.create(user=self.user, book=self.books[0], like=True, rate=5)
+        UserBookRelation.objects.create(user=self.other, book=self.books[1], in_bookmarks=True)
+        self.url = reverse("book-list")
+
+    def test_relation_state(self):
+        self.client.force_authenticate(self.user)
+        results = self.client.get(self.url, data={"with_relation": "true"}).data["results"]
+
+        state = [(book["user_like"], book["user_in_bookmarks"], book["user_rate"]) for book in results]
+        self.assertEqual((True, False, 5), state[0])
+        self.assertEqual((None, None, None), state[1])
+        self.assertNotIn("user_like", self.client.get(self.url).data["results"][0])
+
+    def test_anonymous_gets_plain_list(self):
+        results = self.client.get(self.url, data={"with_relation": "true"}).data["results"]
+
+        self.assertNotIn("user_like", results[0])
+
+    @override_settings(STORE_RESPONSE_CACHE_TIMEOUT=0)
+    def test_constant_queries(self):
+        self.client.force_authenticate(self.user)
+        for page_size in (5, 30):
+            # The conditional GET validators, then the page.
+            with self.assertNumQueries(2):
+                self.client.get(self.url, data={"with_relation": "true", "page_size": page_size})
+
+    def test_cached_per_user(self):
+        self.client.force_authenticate(self.user)
+        mine = self.client.get(self.url, data={"with_relation": "true"})
+        self.client.force_authenticate(self.other)
+        theirs = self.client.get(self.url, data={"with_relation": "true"})
+
+        self.assertTrue(mine.data["results"][0]["user_like"])
+        self.assertIsNone(theirs.data["results"][0]["user_like"])
+        self.assertTrue(theirs.data["results"][1]["user_in_bookmarks"])
+        self.assertNotEqual(mine["ETag"], theirs["ETag"])
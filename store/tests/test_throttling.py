@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store import throttling
+from store.models import Book, UserBookRelation
+from store.throttling import SlidingWindowThrottle, parse_rate
+
+
+class ParseRateTest(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual((20, 1), parse_rate("20/s"))
+        self.assertEqual((600, 60), parse_rate("600/min"))
+        self.assertEqual((100, 600), parse_rate("100/10m"))
+        self.assertEqual((5, 86400), parse_rate("5/day"))
+        with self.assertRaises(ValueError):
+            parse_rate("20 per second")
+
+    def test_wait(self):
+        # 8 * (1 - e) + 6 + 1 <= 10 from e = 5/8 on, 7.5s after half way.
+        self.assertAlmostEqual(7.5, SlidingWindowThrottle.get_wait(10, 60, 0.5, 6, 8))
+        # Current window full: its end, then until 1 fits next to the 10 counted.
+        self.assertAlmostEqual(30 + 6, SlidingWindowThrottle.get_wait(10, 60, 0.5, 10, 0))
+
+
+class ThrottleApiTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        throttling.reset()
+        self.user = User.objects.create(username="test_username", is_staff=True)
+        self.book = Book.objects.create(name="Test book", price=10, discount=0, author="Author")
+        UserBookRelation.objects.create(user=self.user, book=self.book)
+
+    def patch(self):
+        url = reverse("userbookrelation-detail", args=(self.book.id,))
+        return self.client.patch(url, {"like": True}, format="json")
+
+    @override_settings(STORE_THROTTLE_RATES={"relation_update": {"burst": "3/min", "sustained": "100/h"}})
+    def test_relation_update_burst(self):
+        self.client.force_authenticate(self.user)
+        statuses = [self.patch().status_code for _ in range(4)]
+
+        self.assertEqual([200, 200, 200, 429], statuses)
+        self.assertIn("Retry-After", self.patch())
+        stats = self.client.get(reverse("store-stats")).data["throttles"]
+        self.assertEqual(3, stats["relation_update.allowed"])
+        self.assertEqual(2, stats["relation_update.burst.rejected"])
+
+        other = User.objects.create(username="other_username")
+        UserBookRelation.objects.create(user=other, book=self.book)
+        self.client.force_authenticate(other)
+        self.assertEqual(200, self.patch().status_code)
+
+    @override_settings(STORE_THROTTLE_RATES={"book_list": {"burst": "10/s", "sustained": "2/h"}})
+    def test_book_list_sustained(self):
+        url = reverse("book-list")
+        statuses = [self.client.get(url).status_code for _ in range(3)]
+
+        self.assertEqual([200, 200, 429], statuses)
+        self.assertEqual(200, self.client.get(reverse("book-detail", args=(self.book.id,))).status_code)
+
+    @override_settings(STORE_THROTTLE_RATES={"book_list": {"burst": "2/min"}})
+    def test_sliding_window(self):
+        url = reverse("book-list")
+        with mock.patch("store.throttling.time.time", return_value=59.0):
+            self.client.get(url)
+            self.client.get(url)
+        # 3/4 into the next window, a quarter of the 2 previous requests still count.
+        with mock.patch("store.throttling.time.time", return_value=60 + 45.0):
+            self.assertEqual(200, self.client.get(url).status_code)
+            self.assertEqual(429, self.client.get(url).status_code)
+
+    @override_settings(STORE_THROTTLE_RATES={})
+    def test_unconfigured(self):
+        for _ in range(5):
+            self.assertEqual(200, self.client.get(reverse("book-list")).status_code)
+
+    @override_settings(STORE_THROTTLE_RATES={"book_list": {"burst": "1/min"}})
+    def test_bypassed(self):
+        url = reverse("book-list")
+        with throttling.bypassed():
+            statuses = [self.client.get(url).status_code for _ in range(3)]
+        statuses += [self.client.get(url).status_code for _ in range(2)]
+
+        self.assertEqual([200, 200, 200, 200, 429], statuses)
+
+    @override_settings(STORE_THROTTLE_RATES={"book_list": {"burst": "1/min"}})
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        url = reverse("book-list")
+        statuses = [
+            self.client.get(url, HTTP_X_FORWARDED_FOR=address).status_code
+            for address in ("10.0.0.1", "10.0.0.2")
+        ]
+        self.assertEqual([200, 429], statuses)
+
+        with override_settings(REST_FRAMEWORK={"NUM_PROXIES": 1}):
+            self.assertEqual(200, self.client.get(url, HTTP_X_FORWARDED_FOR="10.0.0.3").status_code)
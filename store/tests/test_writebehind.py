@@ -0,0 +1,169 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from store import writebehind
+from store.models import Book, PendingRelationUpdate, UserBookRelation
+
+
+@override_settings(STORE_WRITE_BEHIND="memory", STORE_WRITE_BEHIND_INTERVAL=0)
+class MemoryWriteBehindTest(APITestCase):
+    def setUp(self):
+        writebehind.reset()
+        self.addCleanup(writebehind.reset)
+        self.user = User.objects.create(username="test_username")
+        self.book = Book.objects.create(name="Test book 1", price=25, discount=5, author="Author 1")
+        self.client.force_login(self.user)
+        self.url = reverse("userbookrelation-detail", args=(self.book.id,))
+
+    def patch(self, data, url=None):
+        return self.client.patch(url or self.url, data=json.dumps(data), content_type="application/json")
+
+    def test_toggles_are_coalesced(self):
+        for like in (True, False, True):
+            response = self.patch({"like": like})
+            self.assertEqual(202, response.status_code)
+        response = self.patch({"in_bookmarks": True})
+
+        self.assertEqual({"book": self.book.id, "in_bookmarks": True}, response.data)
+        self.assertFalse(UserBookRelation.objects.exists())
+        self.assertEqual(1, writebehind.flush())
+
+        relation = UserBookRelation.objects.get(user=self.user, book=self.book)
+        self.assertTrue(relation.like)
+        self.assertTrue(relation.in_bookmarks)
+        self.book.refresh_from_db()
+        self.assertEqual(1, self.book.likes_count)
+        self.assertEqual(1, self.book.bookmarks_count)
+
+    @override_settings(STORE_WRITE_BEHIND_BATCH=2)
+    def test_batch_size_flushes(self):
+        other = Book.objects.create(name="Test book 2", price=5, discount=0, author="Author 2")
+        self.patch({"like": True})
+        self.assertFalse(UserBookRelation.objects.exists())
+
+        self.patch({"like": True}, url=reverse("userbookrelation-detail", args=(other.id,)))
+
+        self.assertEqual(2, UserBookRelation.objects.filter(like=True).count())
+        self.assertEqual(0, len(writebehind.get_queue()))
+
+    @override_settings(STORE_WRITE_BEHIND_MAX_PENDING=0)
+    def test_full_queue_falls_back_to_sync(self):
+        with self.assertLogs("store.writebehind", "WARNING"):
+            response = self.patch({"like": True})
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(UserBookRelation.objects.get(user=self.user, book=self.book).like)
+
+    def test_rate_is_applied_synchronously(self):
+        response = self.patch({"like": True, "rate": 4})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(4, UserBookRelation.objects.get(user=self.user, book=self.book).rate)
+
+    def test_missing_book(self):
+        response = self.patch({"like": True}, url=reverse("userbookrelation-detail", args=(0,)))
+
+        self.assertEqual(404, response.status_code)
+
+    def test_sync_write_after_queued_toggle(self):
+        self.assertEqual(202, self.patch({"like": True}).status_code)
+        response = self.patch({"like": False, "rate": 3})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(0, writebehind.flush())
+        relation = UserBookRelation.objects.get(user=self.user, book=self.book)
+        self.assertEqual((False, 3), (relation.like, relation.rate))
+        self.book.refresh_from_db()
+        self.assertEqual(0, self.book.likes_count)
+
+    def test_sync_write_keeps_queued_fields(self):
+        self.patch({"in_bookmarks": True})
+        self.patch({"rate": 4})
+
+        relation = UserBookRelation.objects.get(user=self.user, book=self.book)
+        self.assertEqual((True, 4), (relation.in_bookmarks, relation.rate))
+
+    def test_bulk_after_queued_toggle(self):
+        self.patch({"like": True})
+        response = self.client.post(
+            reverse("userbookrelation-bulk"),
+            data=json.dumps([{"book": self.book.id, "like": False, "in_bookmarks": True}]),
+            content_type="application/json",
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(0, writebehind.flush())
+        relation = UserBookRelation.objects.get(user=self.user, book=self.book)
+        self.assertEqual((False, True), (relation.like, relation.in_bookmarks))
+
+    def test_taken_toggles_are_restored_on_failure(self):
+        self.patch({"like": True})
+        with self.assertRaises(DatabaseError):
+            with writebehind.take_pending(self.user.id, [self.book.id]) as pending:
+                self.assertEqual({self.book.id: {"like": True}}, pending)
+                raise DatabaseError
+
+        self.assertEqual(1, writebehind.flush())
+        self.assertTrue(UserBookRelation.objects.get(user=self.user, book=self.book).like)
+
+    def test_deleted_user_is_dropped_on_flush(self):
+        other = User.objects.create(username="other_username")
+        writebehind.get_queue().put(other.id, self.book.id, {"like": True})
+        self.patch({"like": True})
+        other.delete()
+
+        self.assertEqual(1, writebehind.flush())
+        self.assertEqual(0, len(writebehind.get_queue()))
+        self.assertEqual(self.user, UserBookRelation.objects.get().user)
+
+    @override_settings(STORE_WRITE_BEHIND="")
+    def test_disabled(self):
+        self.assertEqual(200, self.patch({"like": True}).status_code)
+
+
+@override_settings(STORE_WRITE_BEHIND="database", STORE_WRITE_BEHIND_INTERVAL=0)
+class DatabaseWriteBehindTest(APITestCase):
+    def setUp(self):
+        writebehind.reset()
+        self.addCleanup(writebehind.reset)
+        self.user = User.objects.create(username="test_username")
+        self.book = Book.objects.create(name="Test book 1", price=25, discount=5, author="Author 1")
+        UserBookRelation.objects.create(user=self.user, book=self.book, like=True, rate=3)
+        self.client.force_login(self.user)
+        self.url = reverse("userbookrelation-detail", args=(self.book.id,))
+
+    def test_queued_in_database(self):
+        for data in ({"like": False}, {"in_bookmarks": True}):
+            response = self.client.patch(self.url, data=json.dumps(data), content_type="application/json")
+            self.assertEqual(202, response.status_code)
+
+        pending = PendingRelationUpdate.objects.get()
+        self.assertEqual((False, True), (pending.like, pending.in_bookmarks))
+
+        call_command("flush_relation_updates", stdout=StringIO())
+
+        self.assertFalse(PendingRelationUpdate.objects.exists())
+        relation = UserBookRelation.objects.get(user=self.user, book=self.book)
+        self.assertEqual((False, True, 3), (relation.like, relation.in_bookmarks, relation.rate))
+        self.book.refresh_from_db()
+        self.assertEqual(
+            (0, 1, 1), (self.book.likes_count, self.book.bookmarks_count, self.book.rating_count)
+        )
+
+    def test_sync_write_after_queued_toggle(self):
+        self.client.patch(self.url, data=json.dumps({"like": False}), content_type="application/json")
+        response = self.client.patch(
+            self.url, data=json.dumps({"like": True, "rate": 5}), content_type="application/json"
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(PendingRelationUpdate.objects.exists())
+        relation = UserBookRelation.objects.get(user=self.user, book=self.book)
+        self.assertEqual((True, 5), (relation.like, relation.rate))
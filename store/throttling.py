@@ -0,0 +1,171 @@
+"""
+Sliding window rate limits kept in the Django cache.
+
+Every limit, e.g. ``"20/s"`` or ``"600/10min"``, counts the requests of a
+client in fixed windows with atomic ``cache.incr()`` calls. The rate is
+estimated as the count of the current window plus the count of the previous
+one weighted by how much of it still overlaps the sliding window, which
+smooths the edges of fixed windows without storing a timestamp per request.
+A throttle checks a short burst limit and a long sustained limit, for a
+client identified by its user id, or by its address when anonymous. The
+address is ``REMOTE_ADDR``: ``X-Forwarded-For`` is only used when DRF's
+``NUM_PROXIES`` says how many of its entries the proxies in front of the
+server added, otherwise a client could send a new one to get a new bucket.
+
+The check costs a ``get_many`` and one ``incr`` per limit, about 50µs for
+two limits with the locmem cache. With a shared cache (memcached, redis) the
+limits hold across processes. A token bucket would need a compare-and-set,
+which the cache API does not offer.
+"""
+import functools
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from store.cache import get_cache
+
+RATE_RE = re.compile(r"^(\d+)/(\d*)(s|sec|m|min|h|hour|d|day)$")
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+# Number of bypassed() blocks running, in any thread.
+_bypassed = 0
+
+
+def record(event, count=1):
+    with _stats_lock:
+        _stats[event] += count
+
+
+def stats():
+    """Allowed and rejected requests per ``scope``, and rejections per limit."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset():
+    """Forget the counters, for tests."""
+    with _stats_lock:
+        _stats.clear()
+
+
+@contextmanager
+def bypassed():
+    """Let every request of the process through while the block runs, for load tests."""
+    global _bypassed
+    with _stats_lock:
+        _bypassed += 1
+    try:
+        yield
+    finally:
+        with _stats_lock:
+            _bypassed -= 1
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"100/min"`` or ``"20/10s"`` as ``(requests, seconds)``."""
+    match = RATE_RE.match(rate.replace(" ", ""))
+    if match is None:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '100/min' or '20/10s'.")
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[unit[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Burst and sustained limits of ``scope``, from ``STORE_THROTTLE_RATES``::
+
+        STORE_THROTTLE_RATES = {'book_list': {'burst': '20/s', 'sustained': '600/min'}}
+
+    A scope or a limit that is not configured is not enforced.
+    """
+
+    scope = None
+    # Keys are validated char by char on every cache call, keep them short.
+    key_prefix = "store:t"
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_limits(self):
+        rates = getattr(settings, "STORE_THROTTLE_RATES", {}).get(self.scope) or {}
+        return [(name, *parse_rate(rate)) for name, rate in sorted(rates.items()) if rate]
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"u{request.user.pk}"
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return super().get_ident(request)
+
+    def allow_request(self, request, view):
+        limits = self.get_limits()
+        if not limits or _bypassed:
+            return True
+        now = time.time()
+        ident = self.get_ident(request)
+        cache = get_cache()
+
+        windows = []
+        for name, limit, period in limits:
+            index, offset = divmod(now, period)
+            key = f"{self.key_prefix}:{self.scope}:{name}:{ident}"
+            windows.append((name, limit, period, offset / period, key, int(index)))
+        previous = cache.get_many([f"{key}:{index - 1}" for *_, key, index in windows])
+
+        counted = []
+        for name, limit, period, elapsed, key, index in windows:
+            current_key = f"{key}:{index}"
+            try:
+                current = cache.incr(current_key)
+            except ValueError:
+                # Kept for the next window, where it is the previous one.
+                if cache.add(current_key, 1, timeout=2 * period + 1):
+                    current = 1
+                else:
+                    current = cache.incr(current_key)
+            counted.append(current_key)
+            previous_count = previous.get(f"{key}:{index - 1}", 0)
+            if previous_count * (1 - elapsed) + current > limit:
+                # Rejected requests do not count against the client.
+                for counted_key in counted:
+                    try:
+                        cache.decr(counted_key)
+                    except ValueError:
+                        pass
+                self.wait_seconds = self.get_wait(limit, period, elapsed, current - 1, previous_count)
+                record(f"{self.scope}.rejected")
+                record(f"{self.scope}.{name}.rejected")
+                return False
+        record(f"{self.scope}.allowed")
+        return True
+
+    @staticmethod
+    def get_wait(limit, period, elapsed, current, previous):
+        """Seconds until one more request fits, ``current`` and ``previous`` window counts."""
+        # previous * (1 - e) + current + 1 <= limit, solved for e.
+        if previous and current + 1 < limit:
+            fits_at = 1 - (limit - current - 1) / previous
+            return max(0.0, (fits_at - elapsed) * period)
+        # Otherwise in the next window, where current is the previous count.
+        fits_at = 1 - (limit - 1) / current if current else 0.0
+        return (1 - elapsed) * period + min(max(fits_at, 0.0), 1.0) * period
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class BookListThrottle(SlidingWindowThrottle):
+    scope = "book_list"
+
+
+class RelationUpdateThrottle(SlidingWindowThrottle):
+    scope = "relation_update"
@@ -1,10 +1,26 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
 
-from store.views import BookViewSet, UserBookRelationView
+from store import async_views
+from store.views import BookViewSet, ShelfViewSet, StatsView, TokenView, UserBookRelationView
 
 router = SimpleRouter()
 router.register(r'book', BookViewSet)
 router.register(r'book_relation', UserBookRelationView)
 
-urlpatterns = []
+urlpatterns = [
+    path('stats/', StatsView.as_view(), name='store-stats'),
+    path('token/', TokenView.as_view(), name='store-token'),
+    path('async/book/', async_views.book_list, name='async-book-list'),
+    path('async/book/<pk>/', async_views.book_detail, name='async-book-detail'),
+    path('async/book_relation/<book>/', async_views.book_relation, name='async-userbookrelation-detail'),
+]
+urlpatterns += [
+    path(
+        f'me/{shelf}/',
+        ShelfViewSet.as_view({'get': 'list'}, shelf=shelf, basename='me'),
+        name=f'me-{shelf}',
+    )
+    for shelf in ShelfViewSet.SHELVES
+]
 urlpatterns += router.urls
@@ -1,52 +1,308 @@
-from django.db.models.aggregates import Avg, Count
-from django.db.models.expressions import F, Case, When
+from django.db.models import FilteredRelation, FloatField, Q
+from django.db.models.expressions import ExpressionWrapper, F
+from django.db.models.functions import Cast, NullIf
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework.mixins import UpdateModelMixin
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
+from rest_framework.mixins import ListModelMixin, UpdateModelMixin
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+from rest_framework.pagination import _positive_int
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from store import cache, instrumentation, leaderboards, throttling, writebehind
+from store.auth import get_token_max_age, make_token
+from store.backends import pool
+from store.cache import CachedResponseMixin
+from store.conditional import ConditionalGetMixin
+from store.export import stream_rows
+from store.importer import READERS, import_books, read_stream
+from store.logic import bulk_update_relations, lock_relations
 from store.models import Book, UserBookRelation
+from store.pagination import KeysetPagination
 from store.permisions import IsOwnerOrReadOnly
-from store.serializer import BookSerializer, UserBookRelationSerializer
+from store.renderers import CSVRenderer, JSONLinesRenderer
+from store.rows import RowListMixin
+from store.search import BookSearchFilter
+from store.serializer import (
+    BookDetailSerializer,
+    BookSerializer,
+    BookUserStateSerializer,
+    BulkUserBookRelationSerializer,
+    UserBookRelationSerializer,
+)
+from store.throttling import BookListThrottle, RelationUpdateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
-class BookViewSet(ModelViewSet):
+class BookViewSet(ConditionalGetMixin, CachedResponseMixin, RowListMixin, ModelViewSet):
     queryset = (
         Book.objects.all()
         .annotate(
-            annotated_likes=Count(Case(When(userbookrelation__like=True, then=1))),
-            annotated_in_bookmarks=Count(Case(When(userbookrelation__in_bookmarks=True, then=1))),
             discount_price=F('price') - F('discount'),
-            rating=Avg("userbookrelation__rate"),
+            rating=ExpressionWrapper(
+                Cast("rating_sum", FloatField()) / NullIf("rating_count", 0),
+                output_field=FloatField(),
+            ),
         )
         .order_by("id")
     )
     serializer_class = BookSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, BookSearchFilter, OrderingFilter]
     filter_fields = ["price"]
     search_fields = ["name", "author"]
-    ordering_fields = ["price", "author"]
+    ordering_fields = ["price", "author", "search_rank", "rating_score"]
     permission_classes = [
         IsOwnerOrReadOnly,
     ]
 
+    user_relation_query_param = "with_relation"
+
+    def wants_user_relation(self):
+        """Whether ``?with_relation=true`` asks for the caller's relation state in the list."""
+        return (
+            self.action == "list"
+            and self.request.user.is_authenticated
+            and self.request.query_params.get(self.user_relation_query_param) in ("1", "true")
+        )
+
+    def get_throttles(self):
+        if self.action == "list":
+            return [BookListThrottle()]
+        return super().get_throttles()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants_user_relation():
+            queryset = with_user_relation(queryset, self.request.user)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return BookDetailSerializer
+        if self.wants_user_relation():
+            return BookUserStateSerializer
+        return super().get_serializer_class()
+
+    def get_cache_key_extra(self, request):
+        return (request.user.pk,) if self.wants_user_relation() else ()
+
+    def get_etag_extra(self, request):
+        return (request.user.pk,) if self.wants_user_relation() else ()
+
     def perform_create(self, serializer):
         serializer.validated_data["owner"] = self.request.user
         serializer.save()
 
+    import_content_types = {
+        "text/csv": "csv",
+        "application/x-ndjson": "jsonl",
+        "application/jsonl": "jsonl",
+    }
+
+    @action(detail=False, renderer_classes=[JSONLinesRenderer, CSVRenderer])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        # id breaks ordering ties, so an export is reproducible.
+        queryset = queryset.order_by(*queryset.query.order_by, "id")
+        renderer = request.accepted_renderer
+        rows = stream_rows(queryset, self.get_serializer_class(), renderer)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        return StreamingHttpResponse(rows, content_type=content_type)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsAuthenticated],
+    )
+    def import_books(self, request):
+        """Stream a CSV or JSON lines body into new books owned by the caller, see store.importer."""
+        reader = self.import_content_types.get(request.content_type.split(";")[0].strip())
+        if reader is None:
+            raise UnsupportedMediaType(request.content_type)
+        rows = read_stream(READERS[reader], request.stream) if request.stream else []
+        return Response(import_books(rows, owner=request.user))
+
+    @action(detail=False, url_path=r"leaderboard/(?P<metric>[a-z]+)")
+    def leaderboard(self, request, metric):
+        """Top books by ``metric`` (liked, bookmarked, rated), from store.leaderboards."""
+        try:
+            board = leaderboards.get_leaderboard(metric)
+        except KeyError:
+            raise Http404
+        try:
+            limit = _positive_int(request.query_params.get("limit", board.size), True, board.size)
+        except ValueError:
+            limit = board.size
+
+        book_ids = board.top(limit)
+        row_serializer = self.get_row_serializer()
+        queryset = self.get_queryset().filter(pk__in=book_ids)
+        rows = {row.id: row for row in row_serializer.rows(queryset, "id")}
+        results = row_serializer.serialize(rows[book_id] for book_id in book_ids if book_id in rows)
+        return Response({"metric": metric, "results": results})
+
+
+def with_user_relation(queryset, user):
+    """
+    Annotate ``user_like``, ``user_in_bookmarks`` and ``user_rate`` of ``user``.
+
+    The relation is joined once with a ``FilteredRelation`` on the
+    (user, book) unique index, instead of one lookup per book.
+    """
+    return queryset.annotate(
+        user_relation=FilteredRelation(
+            "userbookrelation", condition=Q(userbookrelation__user=user.pk)
+        ),
+    ).annotate(
+        user_like=F("user_relation__like"),
+        user_in_bookmarks=F("user_relation__in_bookmarks"),
+        user_rate=F("user_relation__rate"),
+    )
+
+
+class ShelfViewSet(RowListMixin, ListModelMixin, GenericViewSet):
+    """
+    The caller's bookmarked, liked, rated or owned books, keyset paginated.
+
+    A page is a single query: the relation filter and state come from the
+    same join and rows are serialized from ``values_list``, so nothing is
+    loaded per book.
+    """
+
+    SHELVES = {
+        "bookmarks": lambda user: Q(user_in_bookmarks=True),
+        "likes": lambda user: Q(user_like=True),
+        "rated": lambda user: Q(user_rate__isnull=False),
+        "owned": lambda user: Q(owner=user.pk),
+    }
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = BookUserStateSerializer
+    pagination_class = KeysetPagination
+    shelf = None
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = with_user_relation(BookViewSet.queryset.all(), user)
+        return queryset.filter(self.SHELVES[self.shelf](user))
+
 
 class UserBookRelationView(UpdateModelMixin, GenericViewSet):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [RelationUpdateThrottle]
     queryset = UserBookRelation.objects.all()
     serializer_class = UserBookRelationSerializer
     lookup_field = "book"
 
+    # Queued write-behind toggles of the updated pair, applied under the request.
+    pending = None
+
+    def get_book_id(self):
+        try:
+            return int(self.kwargs["book"])
+        except ValueError:
+            raise Http404
+
     def get_object(self):
-        obj, _ = UserBookRelation.objects.get_or_create(
-            user_id=self.request.user.id, book_id=self.kwargs["book"]
+        book_id = self.get_book_id()
+        relations, _ = lock_relations(self.request.user.id, [book_id])
+        if book_id not in relations:
+            raise Http404
+        relation = relations[book_id]
+        for field, value in (self.pending or {}).items():
+            setattr(relation, field, value)
+        return relation
+
+    def update(self, request, *args, **kwargs):
+        if kwargs.get("partial") and writebehind.get_queue() is not None:
+            response = self.queue_update(request)
+            if response is not None:
+                return response
+        book_id = self.get_book_id()
+        with writebehind.take_pending(request.user.id, [book_id]) as pending:
+            self.pending = pending.get(book_id)
+            return super().update(request, *args, **kwargs)
+
+    def queue_update(self, request):
+        """Acknowledge a like/bookmark toggle queued by store.writebehind, if it can be."""
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        fields = dict(serializer.validated_data)
+        if not fields or set(fields) - set(writebehind.QUEUED_FIELDS):
+            return None
+        book_id = self.get_book_id()
+        if not Book.objects.filter(pk=book_id).exists():
+            raise Http404
+        if not writebehind.enqueue(request.user.id, book_id, fields):
+            return None
+        return Response(dict(fields, book=book_id), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = BulkUserBookRelationSerializer(
+            data=request.data, many=True, partial=True, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        book_ids = {item["book"].pk for item in serializer.validated_data}
+        with writebehind.take_pending(request.user.id, book_ids) as pending:
+            results = bulk_update_relations(request.user.id, serializer.validated_data, pending)
+            if any(relation is None for relation, _ in results):
+                # Deleted since validation, rolled back and reported like a missing book.
+                message = serializer.child.fields["book"].error_messages["does_not_exist"]
+                raise ValidationError(
+                    [
+                        {} if relation else {"book": [message.format(pk_value=item["book"].pk)]}
+                        for item, (relation, _) in zip(serializer.validated_data, results)
+                    ]
+                )
+        return Response(
+            [
+                dict(UserBookRelationSerializer(relation).data, created=created)
+                for relation, created in results
+            ]
+        )
+
+
+class StatsView(APIView):
+    """Request metrics per view, and the cache, connection pool and throttle counters."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "views": instrumentation.stats(),
+                "cache": cache.stats(),
+                "db_pools": pool.stats(),
+                "throttles": throttling.stats(),
+            }
+        )
+
+
+class TokenView(APIView):
+    """Exchange a username and password for a signed token, see store.auth."""
+
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        serializer = AuthTokenSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {
+                "token": make_token(serializer.validated_data["user"]),
+                "expires_in": get_token_max_age(),
+            }
         )
-        return obj
 
 
 def auth(request):
@@ -0,0 +1,287 @@
+"""
+Write-behind buffering of like and bookmark toggles.
+
+With ``STORE_WRITE_BEHIND`` set, a relation PATCH that only changes ``like``
+and/or ``in_bookmarks`` is acknowledged with 202 Accepted and queued instead
+of writing the relation and the book counters in a transaction of its own.
+Toggles of the same (user, book) are coalesced, the last value of each field
+wins, and ``flush()`` applies the queue in one transaction: a batched upsert
+of the relations (``store.logic.apply_relation_changes``) and one counter
+``UPDATE`` per distinct delta, instead of one per toggle. The queue is flushed
+every ``STORE_WRITE_BEHIND_INTERVAL`` seconds by a background thread, and as
+soon as it holds ``STORE_WRITE_BEHIND_BATCH`` pairs. With an interval of 0
+there is no thread and the batch size alone triggers flushes.
+
+Durability depends on the mode:
+
+``"memory"``
+    The queue is a dict in the process, each process has its own, so this
+    mode is only correct with a single process: a synchronous write served
+    by another process cannot see a pending toggle, which may then overwrite
+    it when it is flushed. Toggles acknowledged but not flushed yet are lost
+    if the process dies, at most an interval or a batch worth of them. A best
+    effort flush runs at exit.
+``"database"``
+    Toggles are upserted into ``PendingRelationUpdate`` rows before the 202
+    is sent, so an acknowledged toggle survives a crash. Any process, or the
+    ``flush_relation_updates`` command, applies them and deletes the rows in
+    the same transaction, so each is applied exactly once.
+
+The queue holds at most ``STORE_WRITE_BEHIND_MAX_PENDING`` pairs. When it is
+full, or write-behind is off, toggles are applied synchronously as before.
+Until a toggle is flushed, neither the relation nor the book counters and
+cached responses reflect it. A synchronous write of the same (user, book)
+takes the pending toggle first (``take_pending``) and applies it under its
+own fields, so a toggle acknowledged earlier never overwrites a later write
+(within one process in memory mode).
+"""
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, close_old_connections, connection, transaction
+
+from store.logic import apply_relation_changes
+from store.models import PendingRelationUpdate
+
+logger = logging.getLogger(__name__)
+
+QUEUED_FIELDS = ("like", "in_bookmarks")
+
+
+def get_setting(name, default):
+    return getattr(settings, f"STORE_WRITE_BEHIND_{name}", default)
+
+
+def pending_fields(row):
+    return {field: getattr(row, field) for field in QUEUED_FIELDS if getattr(row, field) is not None}
+
+
+class MemoryQueue:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Held while a flush applies its changes, see take().
+        self.flush_lock = threading.Lock()
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def is_batch_full(self):
+        return len(self.pending) >= get_setting("BATCH", 500)
+
+    def put(self, user_id, book_id, fields):
+        with self.lock:
+            key = (user_id, book_id)
+            if key not in self.pending and len(self.pending) >= get_setting("MAX_PENDING", 10000):
+                return False
+            self.pending.setdefault(key, {}).update(fields)
+            return True
+
+    def take(self, user_id, book_ids):
+        # Waits for a flush in progress, which may hold toggles of these pairs.
+        with self.flush_lock, self.lock:
+            return {
+                book_id: self.pending.pop((user_id, book_id))
+                for book_id in book_ids
+                if (user_id, book_id) in self.pending
+            }
+
+    def restore(self, changes):
+        """Put ``changes`` back, under the toggles queued in the meantime."""
+        with self.lock:
+            for key, fields in self.pending.items():
+                changes.setdefault(key, {}).update(fields)
+            self.pending = changes
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                changes, self.pending = self.pending, {}
+            if not changes:
+                return 0
+            # Drop toggles of users deleted since they were queued, otherwise
+            # the failing insert would put the whole batch back every time.
+            users = set(
+                User.objects.filter(pk__in={user_id for user_id, _ in changes}).values_list(
+                    "pk", flat=True
+                )
+            )
+            changes = {key: fields for key, fields in changes.items() if key[0] in users}
+            try:
+                with transaction.atomic():
+                    apply_relation_changes(changes)
+            except Exception:
+                self.restore(changes)
+                raise
+            return len(changes)
+
+
+class DatabaseQueue:
+    def __init__(self):
+        # Rows seen by the last insert, saves a count per toggle.
+        self.size_hint = 0
+
+    def __len__(self):
+        return PendingRelationUpdate.objects.count()
+
+    def is_batch_full(self):
+        return self.size_hint >= get_setting("BATCH", 500)
+
+    def put(self, user_id, book_id, fields):
+        with transaction.atomic():
+            pending = PendingRelationUpdate.objects.filter(user_id=user_id, book_id=book_id)
+            if pending.update(**fields):
+                return True
+            self.size_hint = len(self) + 1
+            if self.size_hint > get_setting("MAX_PENDING", 10000):
+                return False
+            try:
+                with transaction.atomic():
+                    PendingRelationUpdate.objects.create(user_id=user_id, book_id=book_id, **fields)
+            except IntegrityError:
+                # Queued concurrently by another request.
+                pending.update(**fields)
+            return True
+
+    def take(self, user_id, book_ids):
+        # Locked and deleted in the caller's transaction, a rollback keeps them.
+        rows = list(
+            PendingRelationUpdate.objects.select_for_update().filter(
+                user_id=user_id, book_id__in=book_ids
+            )
+        )
+        PendingRelationUpdate.objects.filter(pk__in=[row.pk for row in rows]).delete()
+        return {row.book_id: pending_fields(row) for row in rows}
+
+    def restore(self, changes):
+        pass
+
+    def flush(self):
+        applied = 0
+        batch_size = get_setting("BATCH", 500)
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    PendingRelationUpdate.objects.select_for_update(skip_locked=skip_locked)
+                    .order_by("pk")[:batch_size]
+                )
+                if not rows:
+                    self.size_hint = 0
+                    return applied
+                changes = {(row.user_id, row.book_id): pending_fields(row) for row in rows}
+                apply_relation_changes(changes)
+                PendingRelationUpdate.objects.filter(pk__in=[row.pk for row in rows]).delete()
+            applied += len(rows)
+            if len(rows) < batch_size:
+                self.size_hint = 0
+                return applied
+
+
+QUEUES = {"memory": MemoryQueue, "database": DatabaseQueue}
+
+_queues = {}
+_flusher = None
+_wakeup = threading.Event()
+_lock = threading.Lock()
+
+
+def get_queue():
+    """The queue of the configured mode, ``None`` when write-behind is off."""
+    mode = getattr(settings, "STORE_WRITE_BEHIND", "")
+    if not mode:
+        return None
+    if mode not in _queues:
+        _queues[mode] = QUEUES[mode]()
+    return _queues[mode]
+
+
+def enqueue(user_id, book_id, fields):
+    """
+    Queue a like/bookmark toggle, returns False when it must be applied
+    synchronously instead (write-behind off or queue full).
+    """
+    queue = get_queue()
+    if queue is None or set(fields) - set(QUEUED_FIELDS):
+        return False
+    if not queue.put(user_id, book_id, fields):
+        logger.warning("Write-behind queue full, applying the toggle synchronously.")
+        return False
+
+    interval = get_setting("INTERVAL", 1.0)
+    if interval:
+        start_flusher(interval)
+    if queue.is_batch_full():
+        if interval:
+            _wakeup.set()
+        else:
+            flush()
+    return True
+
+
+def flush():
+    """Apply every queued toggle, returns how many (user, book) pairs were applied."""
+    queue = get_queue()
+    return queue.flush() if queue is not None else 0
+
+
+@contextmanager
+def take_pending(user_id, book_ids):
+    """
+    Take the queued toggles of ``user_id`` for ``book_ids``, ``{book_id: fields}``,
+    for a synchronous write that applies them under its own fields.
+
+    The block runs in a transaction, the write must lock its relations in
+    it. If the block or the commit fails, the toggles are queued again; in
+    an outer transaction only the block is covered.
+    """
+    queue = get_queue()
+    pending = {}
+    try:
+        with transaction.atomic():
+            if queue is not None:
+                pending = queue.take(user_id, book_ids)
+            yield pending
+    except BaseException:
+        if queue is not None:
+            queue.restore({(user_id, book_id): fields for book_id, fields in pending.items()})
+        raise
+
+
+def _run_flusher(interval):
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception("Write-behind flush failed.")
+        finally:
+            close_old_connections()
+
+
+def start_flusher(interval):
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_run_flusher, args=(interval,), name="store-write-behind", daemon=True
+            )
+            _flusher.start()
+            atexit.register(_flush_at_exit)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Write-behind flush at exit failed.")
+
+
+def reset():
+    """Drop the in-process queues, for tests."""
+    _queues.clear()